@@ -1,97 +1,213 @@
 # agents_orchestration.py
-from langgraph.graph import StateGraph, END
 from ingestion import ingest_all
 from eligibility import build_features, check_eligibility
 from recommendations import generate_recommendations
-import ollama
-import requests
+from llm_client import get_client, LLMError, LLMUnavailable
+from prompts import build_reasoning_prompt
+import reasoning_cache
 import datetime
+from decision_log import manual_check_log
+from metrics import instrument_node, observe_stage, record_llm_call, track_stage
+import threading
+import time
+from typing import Annotated, TypedDict
+
+SYSTEM_PROMPT = "You are an eligibility reasoning assistant. Think step by step (ReAct style)."
 
 # --- State ---
-class AppState(dict):
-    pass
+def merge_dicts(left, right):
+    """Reducer: concurrent branches each add their own keys"""
+    return {**(left or {}), **(right or {})}
+
+class AppState(TypedDict, total=False):
+    paths: dict          # ingest_all keyword arguments
+    data: dict
+    features: dict
+    decision: str
+    reasoning: str
+    recommendations: list
+    timings: Annotated[dict, merge_dicts]  # node name -> seconds
 
 # --- Ollama Health Check ---
 def check_ollama_server():
-    """Check if Ollama server is running on localhost:11434"""
-    try:
-        r = requests.get("http://localhost:11434")
-        return r.status_code == 200
-    except Exception:
-        return False
+    """Check if Ollama server is running (cached for OLLAMA_HEALTH_TTL seconds)"""
+    return get_client().is_healthy()
 
 # --- LLM Reasoning via Ollama ---
 def ollama_reasoning(prompt: str, model="gemma:2b") -> str:
-    if not check_ollama_server():
-        log_manual_check("Ollama server not running")
-        return "[LLM Error] Ollama server not running"
+    stats = {}
+    try:
+        with track_stage("llm"):
+            reasoning = get_client().chat(prompt, model=model, system=SYSTEM_PROMPT, stats=stats)
+        record_llm_call(model, stats)
+        return reasoning
+    except LLMUnavailable as e:
+        log_manual_check(str(e))
+        return f"[LLM Error] {e}"
+    except LLMError as e:
+        log_manual_check(f"Ollama error: {str(e)}")
+        return f"[LLM Error] {str(e)}"
 
+# --- Async LLM Reasoning (for async API handlers) ---
+async def ollama_reasoning_async(prompt: str, model="gemma:2b") -> str:
+    """Same contract as ollama_reasoning, but awaits the HTTP call instead of blocking"""
+    stats = {}
     try:
-        response = ollama.chat(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are an eligibility reasoning assistant. Think step by step (ReAct style)."},
-                {"role": "user", "content": prompt}
-            ],
-            options={"timeout": 120}
-        )
-        return response["message"]["content"]
-    except Exception as e:
+        with track_stage("llm"):
+            reasoning = await get_client().achat(prompt, model=model, system=SYSTEM_PROMPT, stats=stats)
+        record_llm_call(model, stats)
+        return reasoning
+    except LLMUnavailable as e:
+        log_manual_check(str(e))
+        return f"[LLM Error] {e}"
+    except LLMError as e:
         log_manual_check(f"Ollama error: {str(e)}")
         return f"[LLM Error] {str(e)}"
 
+# --- Streaming LLM Reasoning ---
+def _log_stream_timing(model, first_token_s, total_s, stats):
+    """Time-to-first-token is logged separately from total generation time"""
+    ttft = f"{first_token_s:.2f}s" if first_token_s is not None else "n/a"
+    print(f" LLM stream ({model}): first token {ttft}, total {total_s:.2f}s, "
+          f"{stats.get('eval_count', '?')} tokens generated")
+    observe_stage("llm", total_s)
+    record_llm_call(model, stats, first_token_s)
+
+def ollama_reasoning_stream(prompt: str, model="gemma:2b"):
+    """Yield reasoning text as it is generated; failures arrive as one [LLM Error] chunk"""
+    stats = {}
+    start = time.perf_counter()
+    first_token = None
+    try:
+        for chunk in get_client().chat_stream(prompt, model=model, system=SYSTEM_PROMPT, stats=stats):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            yield chunk
+    except LLMUnavailable as e:
+        log_manual_check(str(e))
+        yield f"[LLM Error] {e}"
+        return
+    except LLMError as e:
+        log_manual_check(f"Ollama error: {str(e)}")
+        yield f"[LLM Error] {str(e)}"
+        return
+    _log_stream_timing(model, first_token, time.perf_counter() - start, stats)
+
+async def ollama_reasoning_stream_async(prompt: str, model="gemma:2b"):
+    """Async counterpart of ollama_reasoning_stream"""
+    stats = {}
+    start = time.perf_counter()
+    first_token = None
+    try:
+        async for chunk in get_client().achat_stream(prompt, model=model, system=SYSTEM_PROMPT, stats=stats):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            yield chunk
+    except LLMUnavailable as e:
+        log_manual_check(str(e))
+        yield f"[LLM Error] {e}"
+        return
+    except LLMError as e:
+        log_manual_check(f"Ollama error: {str(e)}")
+        yield f"[LLM Error] {str(e)}"
+        return
+    _log_stream_timing(model, first_token, time.perf_counter() - start, stats)
+
+# --- Background Reasoning Job ---
+def reasoning_job(payload):
+    """
+    JobQueue handler: {"prompt": ..., "model": ..., "cache_key": optional} -> reasoning text.
+    Successful answers are stored under cache_key.
+    """
+    reasoning = ollama_reasoning(payload["prompt"], model=payload.get("model", "gemma:2b"))
+    if payload.get("cache_key") and not reasoning.startswith("[LLM Error]"):
+        reasoning_cache.cache.put(payload["cache_key"], reasoning)
+    return reasoning
+
 # --- Manual Check Logger ---
 def log_manual_check(issue: str):
     """Log manual check issues into a file for admin review"""
-    with open("manual_checks.log", "a") as f:
-        f.write(f"{datetime.datetime.now()} - {issue}\n")
+    manual_check_log.write(f"{datetime.datetime.now()} - {issue}")
 
 # --- Agents ---
+# Nodes return only the keys they produce; reasoning and eligibility run in
+# the same step, so every key has a single writer or a reducer.
+@instrument_node("ingestion_agent")
 def ingestion_agent(state: AppState):
     print("Running IngestionAgent...")
-    state["data"] = ingest_all()
-    return state
+    start = time.perf_counter()
+    data = ingest_all(**state.get("paths", {}), parallel=True)
+    return {"data": data, "timings": {"ingestion": time.perf_counter() - start}}
 
+@instrument_node("reasoning_agent")
 def reasoning_agent(state: AppState):
     print("Running ReasoningAgent (Ollama ReAct)...")
-    prompt = f"User data: {state.get('data',{})}. What factors should I check for eligibility?"
+    start = time.perf_counter()
+    data = state.get("data", {})
+    # Runs beside eligibility, so it builds its own features (cheap) rather than waiting
+    features = build_features(data)
+    prompt, _ = build_reasoning_prompt(features, data=data)
     reasoning = ollama_reasoning(prompt, model="gemma:2b")  #  use small model
-    state["reasoning"] = reasoning
-    return state
+    return {"reasoning": reasoning, "timings": {"reasoning": time.perf_counter() - start}}
 
+@instrument_node("eligibility_agent")
 def eligibility_agent(state: AppState):
     print("Running EligibilityAgent...")
-    features = build_features(state["data"])
+    start = time.perf_counter()
+    features = build_features(state.get("data", {}))
     decision = check_eligibility(features)
-    state["features"] = features
-    state["decision"] = decision
-    return state
+    return {"features": features, "decision": decision,
+            "timings": {"eligibility": time.perf_counter() - start}}
 
+@instrument_node("decision_agent")
 def decision_agent(state: AppState):
     print("Running DecisionAgent...")
+    start = time.perf_counter()
     decision = state.get("decision", "UNKNOWN")
     features = state.get("features", {})
     recs = generate_recommendations(features, decision)
-    state["recommendations"] = recs
-    return state
+    return {"recommendations": recs, "timings": {"decision": time.perf_counter() - start}}
 
 # --- Workflow ---
-workflow = StateGraph(AppState)
-workflow.add_node("ingestion", ingestion_agent)
-workflow.add_node("reasoning", reasoning_agent)
-workflow.add_node("eligibility", eligibility_agent)
-workflow.add_node("decision", decision_agent)
+# ingestion ─┬─ reasoning (LLM) ──────────────┬─ END
+#            └─ eligibility (ML) ── decision ─┘
+# The LLM and ML branches run concurrently, so the critical path is
+# ingestion + max(LLM, ML) instead of their sum.
+def build_workflow():
+    from langgraph.graph import StateGraph, END  # heavy; only needed to run the graph
+
+    workflow = StateGraph(AppState)
+    workflow.add_node("ingestion", ingestion_agent)
+    workflow.add_node("reasoning", reasoning_agent)
+    workflow.add_node("eligibility", eligibility_agent)
+    workflow.add_node("decision", decision_agent)
+
+    workflow.set_entry_point("ingestion")
+    workflow.add_edge("ingestion", "reasoning")    # fan-out: LLM branch
+    workflow.add_edge("ingestion", "eligibility")  # fan-out: ML branch
+    workflow.add_edge("eligibility", "decision")
+    workflow.add_edge(["reasoning", "decision"], END)  # fan-in
+    return workflow
+
+_app = None
+_app_lock = threading.Lock()
 
-workflow.set_entry_point("ingestion")
-workflow.add_edge("ingestion", "reasoning")   # ingestion → reasoning
-workflow.add_edge("reasoning", "eligibility") # reasoning → eligibility
-workflow.add_edge("eligibility", "decision")
-workflow.add_edge("decision", END)
+def get_app():
+    """The compiled graph, built on first use"""
+    global _app
+    with _app_lock:
+        if _app is None:
+            _app = build_workflow().compile()
+    return _app
 
-app = workflow.compile()
+def __getattr__(name):
+    # `from agents_orchestration import app` keeps working, compiled on access
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
-    final_state = app.invoke(AppState())
+    final_state = get_app().invoke(AppState())
     print("\n Reasoning Trace:\n", final_state.get("reasoning"))
     print("\n Features:\n", final_state.get("features"))
     print("\n Decision:\n", final_state.get("decision"))
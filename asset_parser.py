@@ -0,0 +1,103 @@
+# asset_parser.py
+import numpy as np
+
+VALUE_COLUMN = "Value (AED)"
+
+
+# --- Column source (streaming) ---
+def iter_column(source, column=VALUE_COLUMN):
+    """
+    Cell values of one column of the first sheet, found by its header in row 1.
+    Read-only mode streams the sheet row by row; nothing if the column is missing.
+    `source` is a path or a binary file object.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        if column not in header:
+            return
+        col = header.index(column) + 1
+        for (value,) in ws.iter_rows(min_row=2, min_col=col, max_col=col, values_only=True):
+            yield value
+    finally:
+        wb.close()
+
+
+def iter_rows(source):
+    """
+    Row dicts of the first sheet keyed by the row-1 headers (blank cells are
+    None), streamed in read-only mode. Same records shape pandas' to_dict gave.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        for row in rows:
+            if any(value is not None for value in row):
+                yield dict(zip(header, row))
+    finally:
+        wb.close()
+
+
+# --- Coercion ---
+def coerce_values(values):
+    """
+    Float array of cell values. Numbers pass through; strings like "1,250" or
+    "-8 000" become integers; anything else (blank, text, decimals in text) is 0.
+    """
+    values = list(values)
+    out = np.zeros(len(values))
+    if not values:
+        return out
+    kinds = np.fromiter((type(v) in (int, float) for v in values), dtype=bool, count=len(values))
+    texts = np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=len(values))
+
+    if kinds.any():
+        out[kinds] = np.array([values[i] for i in np.flatnonzero(kinds)], dtype=np.float64)
+    if texts.any():
+        idx = np.flatnonzero(texts)
+        s = np.array([values[i] for i in idx], dtype=str)
+        s = np.char.replace(np.char.replace(s, ",", ""), " ", "")
+        # Optional single leading minus, then digits only
+        ok = np.char.isdigit(np.char.lstrip(s, "-")) & (np.char.count(s, "-") <= 1)
+        out[idx[ok]] = s[ok].astype(np.float64)
+    return out
+
+
+def _number(x):
+    x = float(x)
+    return int(x) if x.is_integer() else x
+
+
+# --- Summary ---
+def summarize_values(values):
+    """Assets (positive rows), liabilities (negative rows, as a positive amount) and net worth"""
+    amounts = coerce_values(values)
+    assets = amounts[amounts > 0].sum()
+    liabilities = -amounts[amounts < 0].sum()
+    return {
+        "rows": int(amounts.size),
+        "assets": _number(assets),
+        "liabilities": _number(liabilities),
+        "net_worth": _number(assets - liabilities),
+    }
+
+
+def summarize_rows(rows, column=VALUE_COLUMN):
+    """summarize_values over one column of row dicts (ingestion.read_excel's output)"""
+    return summarize_values(row.get(column) for row in rows)
+
+
+def read_assets(source, column=VALUE_COLUMN):
+    """
+    Asset/liability summary of a workbook, reading only the value column.
+    Not used by ingestion, which keeps every column for excel_assets.
+    """
+    return summarize_values(iter_column(source, column))
@@ -0,0 +1,73 @@
+"""
+Assets workbook net worth: pandas records + Python loop vs asset_parser.
+
+    python -m benchmarks.bench_excel_assets [--rows 1000 10000 50000]
+
+"old" reproduces the previous read_excel (pd.read_excel + to_dict) plus the
+build_features row loop; "rows" is the production path (ingestion's reader
+streams every row in openpyxl read-only mode, then the net_worth extractor
+coerces and sums with numpy); "stream" is asset_parser.read_assets (value
+column only, no production caller). Peak memory is tracemalloc's peak for one
+call. Expect "rows" to be on par with "old": openpyxl does the parsing either
+way.
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+import pandas as pd
+from asset_parser import iter_rows, read_assets, summarize_rows
+from benchmarks.common import time_calls, latency_summary, print_table
+from benchmarks.synthetic_docs import make_assets_workbook
+
+
+def old_net_worth(path):
+    total = 0
+    for item in pd.read_excel(path).to_dict(orient="records"):
+        val = item.get("Value (AED)", 0)
+        if isinstance(val, str):
+            val = val.replace(",", "").replace(" ", "")
+            if val.lstrip("-").isdigit():
+                val = int(val)
+            else:
+                val = 0
+        total += val
+    return total
+
+
+def rows_net_worth(path):
+    return summarize_rows(list(iter_rows(path)))["net_worth"]
+
+
+def streamed_net_worth(path):
+    return read_assets(path)["net_worth"]
+
+
+def peak_mib(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            path = make_assets_workbook(os.path.join(tmp, f"assets_{n}.xlsx"), n)
+            assert old_net_worth(path) == rows_net_worth(path) == streamed_net_worth(path)
+            for name, fn in (("old", old_net_worth), ("rows", rows_net_worth), ("stream", streamed_net_worth)):
+                summary = latency_summary(time_calls(lambda: fn(path), args.runs, warmup=1))
+                rows.append({"rows": n, "path": name, **summary, "peak_mib": peak_mib(lambda: fn(path))})
+    print_table(rows, ["rows", "path", "p50_ms", "p99_ms", "mean_ms", "peak_mib", "n"])
+
+
+if __name__ == "__main__":
+    main()
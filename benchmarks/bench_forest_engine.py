@@ -0,0 +1,51 @@
+"""
+Single-row and batched predict_proba latency: sklearn vs forest_engine.
+
+    python -m benchmarks.bench_forest_engine [--model eligibility_model.pkl]
+"""
+import argparse
+import numpy as np
+from model_registry import MODEL_PATH, get_model
+from forest_engine import CompiledForest
+from benchmarks.common import time_calls, latency_summary, print_table
+
+
+def random_features(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(2000, 15000, n),
+        rng.integers(0, 20, n),
+        rng.integers(18, 65, n),
+        rng.integers(0, 500000, n),
+        rng.integers(1, 7, n),
+    ]).astype(np.float64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--single-runs", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--batch-runs", type=int, default=50)
+    args = parser.parse_args()
+
+    model = get_model(args.model)
+    compiled = CompiledForest(model)
+
+    check = random_features(10000, seed=1)
+    identical = np.array_equal(model.predict_proba(check), compiled.predict_proba(check))
+    print(f"Identical probabilities on {len(check)} rows: {identical}")
+
+    single = random_features(1)
+    batch = random_features(args.batch_size)
+    rows = []
+    for name, predict in (("sklearn", model.predict_proba), ("compiled", compiled.predict_proba)):
+        rows.append({"backend": name, "case": "single row",
+                     **latency_summary(time_calls(lambda: predict(single), args.single_runs))})
+        rows.append({"backend": name, "case": f"batch of {args.batch_size}",
+                     **latency_summary(time_calls(lambda: predict(batch), args.batch_runs))})
+    print_table(rows, ["backend", "case", "p50_ms", "p99_ms", "mean_ms", "n"])
+
+
+if __name__ == "__main__":
+    main()
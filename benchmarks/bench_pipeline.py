@@ -0,0 +1,142 @@
+"""
+End-to-end pipeline benchmark on synthetic applicant bundles.
+
+    python -m benchmarks.bench_pipeline [--applicants 20] [--output pipeline_bench.json]
+
+Generates xlsx / multi-page PDF / ID image / docx bundles, then runs
+ingest_all -> build_features -> check_eligibility -> explain_decision ->
+generate_recommendations -> LLM reasoning for each applicant. The LLM is a
+local stub server (benchmarks/stub_llm.py). The ingestion cache is off unless
+--cache is given. Needs a trained model (python ml_model.py) in the working
+directory or ELIGIBILITY_MODEL_PATH.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from benchmarks.common import latency_summary, print_table
+from benchmarks.stub_llm import start_stub_server
+from benchmarks.synthetic_docs import make_applicant_bundle
+
+STAGES = ["ingest", "features", "eligibility", "explain", "recommendations", "llm"]
+
+
+def peak_rss_mib():
+    """Peak resident set size of this process so far (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--applicants", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=3, help="bank statement pages per applicant")
+    parser.add_argument("--assets", type=int, default=20, help="asset/liability rows per applicant")
+    parser.add_argument("--runs", type=int, default=1, help="passes over the generated bundles")
+    parser.add_argument("--parallel", action="store_true", help="ingest_all(parallel=True)")
+    parser.add_argument("--cache", action="store_true", help="keep the ingestion cache on")
+    parser.add_argument("--llm-tokens", type=int, default=40)
+    parser.add_argument("--llm-token-delay", type=float, default=0.0, help="stub seconds per token")
+    parser.add_argument("--output", default="pipeline_bench.json")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(tokens=args.llm_tokens, token_delay=args.llm_token_delay)
+    # Read at import time by ingestion_cache and llm_client
+    os.environ["OLLAMA_URL"] = url
+    if not args.cache:
+        os.environ["INGEST_CACHE"] = "0"
+
+    from ingestion import ingest_all
+    from eligibility import build_features, check_eligibility_batch
+    from explainability_monitoring import explain_decision
+    from recommendations import generate_recommendations
+    from prompts import build_reasoning_prompt
+    from agents_orchestration import ollama_reasoning
+    from model_registry import warm_start
+
+    warm_start()
+    samples = {stage: [] for stage in STAGES}
+    totals, approved, missing_dob = [], 0, 0
+    rss_before = peak_rss_mib()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        bundles = [make_applicant_bundle(tmp, i, pages=args.pages, asset_count=args.assets, seed=args.seed)
+                   for i in range(args.applicants)]
+        generate_s = time.perf_counter() - start
+
+        for _ in range(args.runs):
+            for paths in bundles:
+                t0 = time.perf_counter()
+                data = ingest_all(**paths, parallel=args.parallel)
+                t1 = time.perf_counter()
+                features = build_features(data)
+                t2 = time.perf_counter()
+                decisions, proba = check_eligibility_batch([features], return_proba=True)
+                decision = decisions[0]
+                t3 = time.perf_counter()
+                if features.get("age") is not None:
+                    explain_decision(features, proba[0])
+                t4 = time.perf_counter()
+                generate_recommendations(features, decision)
+                t5 = time.perf_counter()
+                prompt, _ = build_reasoning_prompt(features, decision, data)
+                reasoning = ollama_reasoning(prompt)
+                t6 = time.perf_counter()
+
+                for stage, (a, b) in zip(STAGES, [(t0, t1), (t1, t2), (t2, t3), (t3, t4), (t4, t5), (t5, t6)]):
+                    samples[stage].append(b - a)
+                totals.append(t6 - t0)
+                approved += "Approved" in decision
+                missing_dob += features.get("age") is None
+                if reasoning.startswith("[LLM Error]"):
+                    print(" Stub LLM call failed:", reasoning)
+    server.shutdown()
+
+    stages = {}
+    for stage in STAGES:
+        summary = latency_summary(samples[stage])
+        summary["throughput_per_s"] = round(len(samples[stage]) / max(sum(samples[stage]), 1e-12), 2)
+        stages[stage] = summary
+    end_to_end = latency_summary(totals)
+    end_to_end["throughput_per_s"] = round(len(totals) / max(sum(totals), 1e-12), 2)
+
+    result = {
+        "benchmark": "pipeline",
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "generate_s": round(generate_s, 3),
+        "stages": stages,
+        "end_to_end": end_to_end,
+        "peak_rss_mib": peak_rss_mib(),
+        "peak_rss_before_mib": rss_before,
+        "applications": len(totals),
+        "approved": approved,
+        # Non-zero usually means Tesseract isn't installed (explain stage then skips)
+        "missing_dob": missing_dob,
+    }
+
+    rows = [{"stage": stage, **stats} for stage, stats in stages.items()]
+    rows.append({"stage": "end_to_end", **end_to_end})
+    print_table(rows, ["stage", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "throughput_per_s", "n"])
+    print(f" Peak RSS: {result['peak_rss_mib']} MiB, DOB missing for {missing_dob}/{len(totals)}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f" Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
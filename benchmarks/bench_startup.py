@@ -0,0 +1,103 @@
+"""
+Cold-start import cost of the entry points, from python -X importtime.
+
+    python -m benchmarks.bench_startup [--runs 5] [--output startup_bench.json]
+
+Each module is imported in a fresh interpreter; the median over --runs of its
+cumulative import time is compared with TARGETS_MS (exit status 1 if any is
+over). Entry points whose third-party dependencies are missing are skipped.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.common import print_table
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budgets (ms). Heavy libraries (PyMuPDF, pytesseract,
+# python-docx, joblib/sklearn, scipy, langgraph, httpx) must stay out of these paths.
+TARGETS_MS = {
+    "server": 900,          # FastAPI + pydantic dominate
+    "run_eligibility": 250,
+    "chatbot_demo": 1500,   # Streamlit itself
+}
+REQUIRES = {"server": ["fastapi"], "chatbot_demo": ["streamlit"]}
+# Imported lazily; flagged if they show up at import time
+HEAVY_MODULES = ["fitz", "pytesseract", "docx", "joblib", "sklearn", "scipy", "langgraph", "httpx", "pandas"]
+
+
+def parse_importtime(stderr):
+    """[(name, self_us, cumulative_us, depth)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure(module):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": REPO_ROOT, "PYTHONWARNINGS": "ignore"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    rows = parse_importtime(proc.stderr)
+    total_us = next(cum for name, _, cum, _ in rows if name == module)
+    loaded = {name.split(".")[0] for name, _, _, _ in rows}
+    return total_us / 1000, rows, sorted(loaded & set(HEAVY_MODULES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=list(TARGETS_MS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per module")
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    args = parser.parse_args()
+
+    results, table, over = {}, [], []
+    for module in args.modules:
+        missing = [dep for dep in REQUIRES.get(module, []) if importlib.util.find_spec(dep) is None]
+        if missing:
+            print(f" Skipping {module}: {', '.join(missing)} not installed")
+            continue
+        runs = [measure(module) for _ in range(args.runs)]
+        median_ms = statistics.median(ms for ms, _, _ in runs)
+        _, rows, heavy = runs[-1]
+        target = TARGETS_MS.get(module)
+        ok = target is None or median_ms <= target
+        if not ok:
+            over.append(module)
+        slowest = sorted((r for r in rows if r[3] == 1), key=lambda r: -r[2])[:args.top]
+        results[module] = {
+            "median_ms": round(median_ms, 1),
+            "min_ms": round(min(ms for ms, _, _ in runs), 1),
+            "target_ms": target,
+            "ok": ok,
+            "heavy_modules_loaded": heavy,
+            "slowest_imports": [{"module": name, "cumulative_ms": round(cum / 1000, 1)}
+                                for name, _, cum, _ in slowest],
+        }
+        table.append({"module": module, "median_ms": results[module]["median_ms"], "target_ms": target,
+                      "ok": ok, "heavy": ",".join(heavy) or "-"})
+
+    print_table(table, ["module", "median_ms", "target_ms", "ok", "heavy"])
+    for module, result in results.items():
+        print(f"\n {module}: " + ", ".join(f"{s['module']} {s['cumulative_ms']}ms" for s in result["slowest_imports"]))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "startup", "python": sys.version.split()[0], "results": results}, f, indent=2)
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
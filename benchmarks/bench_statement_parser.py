@@ -0,0 +1,73 @@
+"""
+Bank statement income extraction: old whole-text path vs statement_parser.
+
+    python -m benchmarks.bench_statement_parser [--pages 5 20 60]
+
+"old" reproduces the original read_pdf (text += page) plus build_features'
+split/list-comprehension lookup; "join+scan" extracts every page, joins and
+scans; "ingest+features" is the production path (ingestion's PDF reader, page
+by page over the whole statement unless PDF_STOP_AT_SALARY=1, then
+build_features' lookup); "stream" reads lines lazily and stops at the salary
+line; "transactions" parses every page into rows (read_statement).
+"""
+import argparse
+import os
+import re
+import tempfile
+import fitz
+from ingestion import _read_pdf
+from statement_parser import first_salary_amount, iter_pdf_lines, iter_text_lines, read_statement
+from benchmarks.common import time_calls, latency_summary, print_table
+from benchmarks.synthetic_docs import make_bank_statement_pdf
+
+
+def old_income(path):
+    text = ""
+    with fitz.open(path) as doc:
+        for page in doc:
+            text += page.get_text()
+    text = text.strip()
+    if "Salary" in str(text):
+        salary_line = [line for line in str(text).split("\n") if "Salary" in line][0]
+        matches = re.findall(r"[+-]?\d{3,}", salary_line)
+        if matches:
+            return int(matches[-1].replace("+", ""))
+    return 0
+
+
+def joined_income(path):
+    with fitz.open(path) as doc:
+        text = "".join(page.get_text() for page in doc).strip()
+    return first_salary_amount(iter_text_lines(text))
+
+
+def production_income(path):
+    return first_salary_amount(iter_text_lines(_read_pdf.uncached(path)))
+
+
+def streamed_income(path):
+    return first_salary_amount(iter_pdf_lines(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20, 60])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = make_bank_statement_pdf(os.path.join(tmp, f"statement_{pages}.pdf"), pages)
+            assert old_income(path) == joined_income(path) == production_income(path) \
+                == streamed_income(path) == read_statement(path)["monthly_income"] == 5000
+            for name, fn in (("old", old_income), ("join+scan", joined_income),
+                             ("ingest+features", production_income), ("stream", streamed_income),
+                             ("transactions", read_statement)):
+                rows.append({"pages": pages, "path": name,
+                             **latency_summary(time_calls(lambda: fn(path), args.runs))})
+    print_table(rows, ["pages", "path", "p50_ms", "p99_ms", "mean_ms", "n"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/stub_llm.py
+"""Local stand-in for the Ollama HTTP API, so benchmarks measure our side of the LLM call."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY_WORDS = ("The applicant's income and net worth were compared against the support "
+               "thresholds; the decision follows from the model's confidence.").split()
+
+
+def make_handler(tokens, token_delay):
+    words = [REPLY_WORDS[i % len(REPLY_WORDS)] for i in range(tokens)]
+    counters = {"done": True, "eval_count": tokens, "prompt_eval_count": 0,
+                "eval_duration": int(tokens * token_delay * 1e9)}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body, content_type="application/json"):
+            payload = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _chunk(self, obj):
+            line = (json.dumps(obj) + "\n").encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+
+        def do_GET(self):
+            self._send("Ollama is running", "text/plain")
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not request.get("stream"):
+                time.sleep(token_delay * tokens)
+                self._send(json.dumps({"message": {"role": "assistant", "content": " ".join(words)}, **counters}))
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for word in words:
+                time.sleep(token_delay)
+                self._chunk({"message": {"role": "assistant", "content": word + " "}, "done": False})
+            self._chunk({"message": {"role": "assistant", "content": ""}, **counters})
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+def start_stub_server(port=0, tokens=40, token_delay=0.0):
+    """Serve in a daemon thread; returns (server, base_url). Call server.shutdown() to stop."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(tokens, token_delay))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
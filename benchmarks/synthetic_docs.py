@@ -0,0 +1,130 @@
+# benchmarks/synthetic_docs.py
+"""Synthetic applicant documents for benchmarks."""
+import datetime
+import os
+import random
+
+DESCRIPTIONS = ["Grocery Store", "Utility Bill", "Fuel Station", "Restaurant", "Pharmacy",
+                "Online Shopping", "Mobile Recharge", "ATM Withdrawal", "School Fees", "Transfer"]
+
+
+def statement_lines(pages, rows_per_page=45, salary=5000, salary_page=0, seed=0):
+    """Lines per page: a header, then dated transactions with one salary credit on `salary_page`"""
+    rng = random.Random(seed)
+    day = datetime.date(2025, 1, 1)
+    out = []
+    for page in range(pages):
+        lines = ["Account Holder: Synthetic Applicant", "Account No: 123456789", "Transactions:"] if page == 0 else []
+        for row in range(rows_per_page):
+            day += datetime.timedelta(days=rng.random() < 0.3)
+            if page == salary_page and row == rows_per_page // 2:
+                lines.append(f"{day.isoformat()}   Salary Credit    +{salary}")
+            else:
+                lines.append(f"{day.isoformat()}   {rng.choice(DESCRIPTIONS):<16} -{rng.randint(20, 2500)}")
+        if page == pages - 1:
+            lines.append(f"Balance: {rng.randint(1000, 50000)} AED")
+        out.append(lines)
+    return out
+
+
+def make_bank_statement_pdf(path, pages, rows_per_page=45, salary=5000, salary_page=0, seed=0):
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for lines in statement_lines(pages, rows_per_page, salary, salary_page, seed):
+        page = doc.new_page(width=595.28, height=841.89)
+        y = 40
+        for line in lines:
+            page.insert_text((31, y), line, fontsize=10, fontname="helv")
+            y += 17
+    doc.save(path)
+    doc.close()
+    return path
+
+
+ASSET_TYPES = [("Bank Balance", 1000, 80000), ("Car", 10000, 120000), ("House", 150000, 2000000),
+               ("Gold", 2000, 40000), ("Shares", 1000, 250000)]
+LIABILITY_TYPES = [("Loan", 5000, 300000), ("Credit Card", 500, 30000), ("Mortgage", 100000, 1500000)]
+
+
+def asset_rows(rows, seed=0, text_ratio=0.1):
+    """(type, value) rows like the sample sheet; some values are text such as "12,500" """
+    rng = random.Random(seed)
+    out = []
+    for _ in range(rows):
+        if rng.random() < 0.3:
+            name, lo, hi = rng.choice(LIABILITY_TYPES)
+            value = -rng.randint(lo, hi)
+        else:
+            name, lo, hi = rng.choice(ASSET_TYPES)
+            value = rng.randint(lo, hi)
+        if rng.random() < text_ratio:
+            value = f"{value:,}"
+        out.append((name, value))
+    return out
+
+
+def make_assets_workbook(path, rows, seed=0):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Assets")
+    ws.append(["Asset Type", "Value (AED)"])
+    for row in asset_rows(rows, seed):
+        ws.append(row)
+    wb.save(path)
+    return path
+
+
+JOB_TITLES = ["Sales Manager", "Accountant", "Driver", "Nurse", "Teacher", "Technician", "Cashier"]
+
+
+def make_id_image(path, dob, id_no, expiry="2030-05-12", size=(1536, 1024)):
+    """Emirates ID style card with the values where ocr_pipeline.ID_REGIONS looks for them"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    w, h = size
+    try:
+        font = ImageFont.load_default(size=int(h * 0.06))
+    except TypeError:  # Pillow < 10.1
+        font = ImageFont.load_default()
+    img = Image.new("RGB", size, (236, 240, 232))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, w, int(h * 0.14)), fill=(30, 90, 60))
+    draw.text((int(w * 0.05), int(h * 0.03)), "RESIDENT IDENTITY CARD", fill="white", font=font)
+    draw.text((int(w * 0.05), int(h * 0.25)), "Name: Synthetic Applicant", fill="black", font=font)
+    for label, value, y0 in (("DOB", dob, 0.43), ("ID NO", id_no, 0.53), ("EXPIRY", expiry, 0.63)):
+        draw.text((int(w * 0.05), int(h * y0)), f"{label}:", fill="black", font=font)
+        draw.text((int(w * 0.25), int(h * y0)), value, fill="black", font=font)
+    img.save(path)
+    return path
+
+
+def make_resume_docx(path, years, title, name="Synthetic Applicant"):
+    import docx
+
+    doc = docx.Document()
+    doc.add_heading(name, level=1)
+    doc.add_paragraph(f"Experience: {years} years - {title}")
+    doc.add_paragraph("Skills: Customer service, MS Office, Communication")
+    doc.add_paragraph("Education: High School Diploma")
+    doc.save(path)
+    return path
+
+
+def make_applicant_bundle(directory, index, pages=3, asset_count=20, seed=0):
+    """Four documents for one applicant; returns ingest_all keyword arguments"""
+    rng = random.Random(seed * 100003 + index)
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, f"applicant_{index}")
+    year = rng.randint(1960, 2004)
+    dob = f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    id_no = f"784-{year}-{rng.randint(1000000, 9999999)}-{rng.randint(1, 9)}"
+    return {
+        "excel_path": make_assets_workbook(f"{stem}_assets.xlsx", asset_count, seed=rng.random()),
+        "pdf_path": make_bank_statement_pdf(f"{stem}_statement.pdf", pages,
+                                            salary=rng.randrange(2000, 20000, 500),
+                                            salary_page=rng.randrange(pages), seed=rng.random()),
+        "img_path": make_id_image(f"{stem}_id.png", dob, id_no),
+        "resume_path": make_resume_docx(f"{stem}_resume.docx", rng.randint(0, 25), rng.choice(JOB_TITLES)),
+    }
@@ -1,10 +1,23 @@
 import streamlit as st
+import os
 import uuid
 from ingestion import ingest_all
-from eligibility import build_features, check_eligibility
+from eligibility import build_features, check_eligibility, warm_model
 from recommendations import generate_recommendations
-from agents_orchestration import ollama_reasoning, check_ollama_server, log_manual_check
-from langsmith_logger import log_trace
+from agents_orchestration import ollama_reasoning_stream, check_ollama_server, log_manual_check
+from prompts import build_reasoning_prompt
+import reasoning_cache
+from langsmith_logger import start_pipeline_trace
+from llm_client import get_client
+
+# Set PERSIST_UPLOADS=1 to also save uploads to data/{session}_* (off by default)
+PERSIST_UPLOADS = os.getenv("PERSIST_UPLOADS", "0") == "1"
+
+@st.cache_resource
+def warm_pipeline():
+    """Model and LLM client, set up once per server process rather than on every rerun"""
+    warm_model()
+    return get_client()
 
 st.title(" Social Support AI Chatbot (LangGraph + Ollama)")
 
@@ -27,65 +40,79 @@ if st.button("Run Evaluation"):
 
     if uploaded_excel and uploaded_pdf and uploaded_img and uploaded_docx:
         st.info(" Files uploaded successfully")
+        warm_pipeline()
+        trace = start_pipeline_trace(user_id)
 
-        # Save files locally with unique session ID
-        excel_path = f"data/{user_id}_assets.xlsx"
-        pdf_path = f"data/{user_id}_bank.pdf"
-        img_path = f"data/{user_id}_id.png"
-        resume_path = f"data/{user_id}_resume.docx"
-
-        with open(excel_path, "wb") as f:
-            f.write(uploaded_excel.getbuffer())
-        with open(pdf_path, "wb") as f:
-            f.write(uploaded_pdf.getbuffer())
-        with open(img_path, "wb") as f:
-            f.write(uploaded_img.getbuffer())
-        with open(resume_path, "wb") as f:
-            f.write(uploaded_docx.getbuffer())
+        uploads = {
+            "excel_path": (uploaded_excel, "assets.xlsx"),
+            "pdf_path": (uploaded_pdf, "bank.pdf"),
+            "img_path": (uploaded_img, "id.png"),
+            "resume_path": (uploaded_docx, "resume.docx"),
+        }
+        if PERSIST_UPLOADS:
+            # Keep a copy per session under data/ (opt-in)
+            sources = {}
+            for arg, (upload, suffix) in uploads.items():
+                path = f"data/{user_id}_{suffix}"
+                with open(path, "wb") as f:
+                    f.write(upload.getbuffer())
+                sources[arg] = path
+        else:
+            # Readers take the uploads' in-memory buffers directly
+            sources = {arg: upload.getbuffer() for arg, (upload, _) in uploads.items()}
 
         # Step 1: Ingestion
         st.subheader("Step 1:  Raw Data Preview")
-        data = ingest_all(
-            excel_path=excel_path,
-            pdf_path=pdf_path,
-            img_path=img_path,
-            resume_path=resume_path,
-        )
+        data = ingest_all(**sources, parallel=True)
         st.json(data)
-        log_trace(user_id, "ingestion", data)
+        trace.span("ingestion", data)
 
         # Step 2: Features
         st.subheader("Step 2:  Extracted Features")
         features = build_features(data)
         st.json(features)
-        log_trace(user_id, "eligibility_features", features)
+        trace.span("eligibility_features", features)
 
         # Step 3: Eligibility
         st.subheader("Step 3:  Decision")
         decision = check_eligibility(features)
         st.success(decision)
-        log_trace(user_id, "decision", decision)
+        trace.span("decision", decision)
 
-        # Step 4: LLM Reasoning
+        # Step 4: LLM Reasoning (streamed in below once recommendations are shown)
         st.subheader("Step 4:  LLM Reasoning Trace")
-        if not check_ollama_server():
-            st.error(" Ollama server not running. Please start with `ollama serve` in another CMD window.")
+        reasoning_box = st.empty()
+        prompt = None
+        cache_key = reasoning_cache.make_key(features, decision, model="gemma:2b")
+        cached = reasoning_cache.cache.get(cache_key)
+        if cached is not None:
+            reasoning_box.write(cached)
+            trace.span("reasoning", cached)
+        elif not check_ollama_server():
+            reasoning_box.error(" Ollama server not running. Please start with `ollama serve` in another CMD window.")
             log_manual_check("Ollama not running at evaluation time")
         else:
-            prompt = f"User data: {data}. System decision: {decision}. Explain briefly why."
-            reasoning = ollama_reasoning(prompt, model="gemma:2b")
-            if reasoning.startswith("[LLM Error]"):
-                st.error(reasoning)
-            else:
-                st.write(reasoning)
-                log_trace(user_id, "reasoning", reasoning)
+            prompt, prompt_stats = build_reasoning_prompt(features, decision, data)
+            st.caption(f"Prompt size: ~{prompt_stats['prompt_tokens']} tokens (raw data prompt: ~{prompt_stats['raw_tokens']})")
+            reasoning_box.info(" Generating reasoning...")
 
         # Step 5: Recommendations
         st.subheader("Step 5:  Recommendations")
         recs = generate_recommendations(features, decision)
         for r in recs:
             st.write("- " + r)
-        log_trace(user_id, "recommendations", recs)
+        trace.span("recommendations", recs)
+
+        if prompt:
+            with reasoning_box.container():
+                reasoning = st.write_stream(ollama_reasoning_stream(prompt, model="gemma:2b"))
+            if "[LLM Error]" in reasoning:
+                reasoning_box.error(reasoning)
+            else:
+                reasoning_cache.cache.put(cache_key, reasoning)
+                trace.span("reasoning", reasoning)
+
+        trace.end(outputs={"decision": decision})
 
     else:
         st.warning(" Please upload all 4 documents before running.")
@@ -0,0 +1,214 @@
+# decision_log.py
+import atexit
+import contextlib
+import datetime
+import glob
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+
+try:
+    import fcntl  # POSIX file locks; without them only one process may write a given log
+except ImportError:
+    fcntl = None
+
+# --- Settings (env overridable) ---
+DECISION_LOG_PATH = os.getenv("DECISION_LOG_PATH", os.path.join("logs", "decisions.jsonl"))
+MANUAL_CHECK_LOG_PATH = os.getenv("MANUAL_CHECK_LOG_PATH", "manual_checks.log")
+LOG_MAX_BYTES = int(os.getenv("DECISION_LOG_MAX_BYTES", str(64 * 1024 * 1024)))
+LOG_MAX_AGE = float(os.getenv("DECISION_LOG_MAX_AGE", str(24 * 3600)))
+LOG_COMPRESS = os.getenv("DECISION_LOG_COMPRESS", "1") != "0"
+LOG_FLUSH_INTERVAL = float(os.getenv("DECISION_LOG_FLUSH_INTERVAL", "1"))
+LOG_BUFFER_LINES = 256
+
+
+# --- Buffered, Rotating Writer ---
+class RotatingLineWriter:
+    """
+    Append-only line sink. Lines are buffered in memory and written in one go
+    every `buffer_lines` lines or `flush_interval` seconds. The file is rotated
+    to `<name>.<timestamp><ext>` once it exceeds `max_bytes` or is older than
+    `max_age` seconds; rotated files are gzipped (if `compress`) by the
+    background flusher, never on a writer's thread. Writes and rotation hold a
+    lock file (`<path>.lock`), so several processes can share one log.
+    """
+
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES, max_age=LOG_MAX_AGE, compress=LOG_COMPRESS,
+                 buffer_lines=LOG_BUFFER_LINES, flush_interval=LOG_FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.buffer_lines = buffer_lines
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()      # guards the buffer; held only briefly by writers
+        self._io_lock = threading.Lock()   # serialises file writes and rotation
+        self._file = None
+        self._opened_at = None
+        self._flusher = None
+        self._lock_file = None
+        self._rotated = []  # waiting for compression
+
+    def write(self, line):
+        with self._lock:
+            self._buffer.append(line)
+            if self._flusher is None:
+                self._start_flusher()
+            if len(self._buffer) < self.buffer_lines:
+                return
+        self.flush()
+
+    def _start_flusher(self):
+        def loop():
+            while True:
+                time.sleep(self.flush_interval)
+                self.flush()
+                self.compress_rotated()
+
+        self._flusher = threading.Thread(target=loop, name=f"log-flush-{os.path.basename(self.path)}", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+        atexit.register(self.compress_rotated)
+
+    def flush(self):
+        with self._io_lock:
+            with self._lock:
+                if not self._buffer:
+                    return
+                lines, self._buffer = self._buffer, []
+            try:
+                with self._file_lock():
+                    f = self._open()
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                    if f.tell() >= self.max_bytes or time.time() - self._opened_at >= self.max_age:
+                        self._rotate()
+            except OSError as e:
+                print(f" Log write failed ({self.path}): {e}")
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        if self._lock_file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._lock_file = open(self.path + ".lock", "a")
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _open(self):
+        # Another process may have rotated the file since we opened it
+        if self._file is not None and not self._is_current():
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._opened_at = time.time()
+        return self._file
+
+    def _is_current(self):
+        try:
+            return os.stat(self.path).st_ino == os.fstat(self._file.fileno()).st_ino
+        except OSError:
+            return False
+
+    def _rotate(self):
+        # Called with the file lock held: no process writes to the renamed file afterwards
+        self._file.close()
+        self._file = None
+        base, ext = os.path.splitext(self.path)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        rotated = f"{base}.{stamp}{ext}"
+        os.replace(self.path, rotated)
+        if self.compress:
+            with self._lock:
+                self._rotated.append(rotated)
+
+    def compress_rotated(self):
+        """Gzip files rotated since the last call (runs on the flusher thread)"""
+        with self._lock:
+            pending, self._rotated = self._rotated, []
+        for rotated in pending:
+            try:
+                with open(rotated, "rb") as src, gzip.open(rotated + ".gz.tmp", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.replace(rotated + ".gz.tmp", rotated + ".gz")
+                os.remove(rotated)
+            except OSError as e:
+                print(f" Log compression failed ({rotated}): {e}")
+
+    def files(self):
+        """Rotated files oldest first, then the live file"""
+        base, ext = os.path.splitext(self.path)
+        rotated = sorted(glob.glob(f"{base}.*{ext}") + glob.glob(f"{base}.*{ext}.gz"))
+        return rotated + ([self.path] if os.path.exists(self.path) else [])
+
+
+# --- Decision Log ---
+def _as_iso(value):
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
+
+
+class DecisionLog:
+    """Line-delimited JSON record of every eligibility decision, with a simple scan/query API"""
+
+    def __init__(self, path=DECISION_LOG_PATH, **writer_options):
+        self.writer = RotatingLineWriter(path, **writer_options)
+
+    def log(self, user_id, features, decision, explain_report=None):
+        entry = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "user_id": user_id,
+            "features": features,
+            "decision": decision,
+            "explainability": explain_report,
+        }
+        self.writer.write(json.dumps(entry, separators=(",", ":"), default=str))
+        return entry
+
+    def query(self, user_id=None, start=None, end=None, decision=None, limit=None):
+        """
+        Yield entries oldest first. `start`/`end` are datetimes or ISO strings
+        (end exclusive); `decision` matches case-insensitively as a substring,
+        e.g. "approved".
+        """
+        self.writer.flush()
+        start, end = _as_iso(start), _as_iso(end)
+        # Cheap substring check before paying for json.loads
+        user_marker = f'"user_id":{json.dumps(user_id)}' if user_id is not None else None
+        decision_text = decision.lower() if decision else None
+
+        found = 0
+        for path in self.writer.files():
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if user_marker and user_marker not in line:
+                        continue
+                    entry = json.loads(line)
+                    ts = entry.get("timestamp", "")
+                    if start and ts < start:
+                        continue
+                    if end and ts >= end:
+                        continue
+                    if decision_text and decision_text not in str(entry.get("decision", "")).lower():
+                        continue
+                    yield entry
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+
+
+decision_log = DecisionLog()
+manual_check_log = RotatingLineWriter(MANUAL_CHECK_LOG_PATH)
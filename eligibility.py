@@ -1,94 +1,185 @@
-import joblib
 import numpy as np
+import os
 import re
 from datetime import datetime
+from model_registry import get_model, get_registry, warm_start
+from statement_parser import first_salary_amount, iter_text_lines
+from asset_parser import summarize_rows
+from feature_registry import FeatureRegistry
 
 # -------- Build Features --------
-def build_features(data):
-    """Convert ingested raw data into numeric features"""
-    features = {}
-
-    # --- Income (from bank statement PDF text) ---
-    features["income"] = 0
-    if "pdf_bank" in data and "Salary" in str(data["pdf_bank"]):
-        try:
-            salary_line = [line for line in str(data["pdf_bank"]).split("\n") if "Salary" in line][0]
-            # Capture numbers with optional + or - sign
-            matches = re.findall(r"[+-]?\d{3,}", salary_line)
-            if matches:
-                features["income"] = int(matches[-1].replace("+", ""))
-        except Exception as e:
-            print(" Income parse error:", e)
-
-    # --- Employment years (from resume DOCX) ---
-    features["employment_years"] = 0
-    if "docx_resume" in data and "Experience" in str(data["docx_resume"]):
-        match = re.search(r"(\d+)\s+years", str(data["docx_resume"]), re.IGNORECASE)
-        if match:
-            features["employment_years"] = int(match.group(1))
-
-    # --- Age (from Emirates ID OCR → DOB) ---
-    features["age"] = None
-    if "image_id" in data:
-        # Match clean YYYY-MM-DD only
-        dob_match = re.search(r"\b(19\d{2}|20\d{2})-(\d{2})-(\d{2})\b", str(data["image_id"]))
-        if dob_match:
-            try:
-                dob_str = dob_match.group(0)  # e.g., "1990-05-12"
-                dob = datetime.strptime(dob_str, "%Y-%m-%d")
-                today = datetime.today()
-                features["age"] = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-            except Exception as e:
-                print(" DOB parse error:", e)
-
-    # --- Net worth (from assets excel list) ---
-    features["net_worth"] = 0
-    if "excel_assets" in data:
-        try:
-            total = 0
-            for item in data["excel_assets"]:
-                val = item.get("Value (AED)", 0)
-                if isinstance(val, str):
-                    val = val.replace(",", "").replace(" ", "")
-                    if val.lstrip("-").isdigit():
-                        val = int(val)
-                    else:
-                        val = 0
-                total += val
-            features["net_worth"] = total
-        except Exception as e:
-            print(" Net worth parse error:", e)
-
-    # --- Family size (default / mock) ---
-    features["family_size"] = 3
-
-    return features
+# Each feature is a declared extractor (see feature_registry); registration
+# order is the order of the features dict.
+features_registry = FeatureRegistry()
+
+EXPERIENCE_YEARS_RE = re.compile(r"(\d+)\s+years", re.IGNORECASE)
+DOB_RE = re.compile(r"\b(19\d{2}|20\d{2})-(\d{2})-(\d{2})\b")  # clean YYYY-MM-DD only
+
+# --- Income (from bank statement PDF text) ---
+@features_registry.register("income", inputs=["pdf_bank"])
+def extract_income(inputs):
+    if not inputs.has("pdf_bank"):
+        return 0
+    try:
+        # Streams lines and stops at the first "Salary" line
+        amount = first_salary_amount(iter_text_lines(inputs.text("pdf_bank")))
+        return amount if amount is not None else 0
+    except Exception as e:
+        print(" Income parse error:", e)
+        return 0
+
+# --- Employment years (from resume DOCX) ---
+@features_registry.register("employment_years", inputs=["docx_resume"])
+def extract_employment_years(inputs):
+    if not inputs.has("docx_resume"):
+        return 0
+    resume = inputs.text("docx_resume")
+    if "Experience" not in resume:
+        return 0
+    match = EXPERIENCE_YEARS_RE.search(resume)
+    return int(match.group(1)) if match else 0
+
+# --- Age (from Emirates ID OCR → DOB) ---
+# The gate: without a readable DOB the ID is invalid and nothing else matters
+@features_registry.register("age", inputs=["image_id"], default=None, gate=True)
+def extract_age(inputs):
+    if not inputs.has("image_id"):
+        return None
+    dob_match = DOB_RE.search(inputs.text("image_id"))
+    if not dob_match:
+        return None
+    try:
+        dob = datetime.strptime(dob_match.group(0), "%Y-%m-%d")  # e.g., "1990-05-12"
+        today = datetime.today()
+        return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+    except Exception as e:
+        print(" DOB parse error:", e)
+        return None
+
+# --- Net worth (from assets excel list) ---
+@features_registry.register("net_worth", inputs=["excel_assets"])
+def extract_net_worth(inputs):
+    if not inputs.has("excel_assets"):
+        return 0
+    assets = inputs.raw("excel_assets")
+    if isinstance(assets, dict):
+        # An asset_parser summary, or read_excel's {"error": ...} (counts as 0)
+        return assets.get("net_worth", 0)
+    try:
+        # Row dicts from ingestion.read_excel: vectorized coercion and sum of "Value (AED)"
+        return summarize_rows(assets)["net_worth"]
+    except Exception as e:
+        print(" Net worth parse error:", e)
+        return 0
+
+# --- Family size (default / mock) ---
+@features_registry.register("family_size", default=3)
+def extract_family_size(inputs):
+    return 3
+
+
+def build_features(data, short_circuit=False, timings=None):
+    """
+    Convert ingested raw data into numeric features.
+    With short_circuit=True an unreadable DOB stops evaluation, so with a lazy
+    `data` (ingestion.ingest_lazy) the PDF, Excel and DOCX are never read and
+    the features they'd give are None.
+    Per-extractor seconds are written into `timings` if given.
+    """
+    return features_registry.evaluate(data, short_circuit=short_circuit, timings=timings)
 
 
 # -------- ML Eligibility --------
-model = joblib.load("eligibility_model.pkl")
+# Column order the model was trained on (see ml_model.generate_synthetic_data)
+FEATURE_ORDER = ["income", "employment_years", "age", "net_worth", "family_size"]
 
-def ml_check_eligibility(features):
-    if features.get("age") is None:
-        return " ID Card Not Valid (DOB missing in OCR)"
+# "sklearn" or "compiled" (forest_engine: same probabilities, far less per-call overhead)
+INFERENCE_BACKEND = os.getenv("ELIGIBILITY_BACKEND", "sklearn")
+# Above this many rows sklearn's Cython traversal wins again (see benchmarks/bench_forest_engine.py)
+COMPILED_MAX_ROWS = int(os.getenv("ELIGIBILITY_COMPILED_MAX_ROWS", "256"))
+
+
+class FeatureMatrix:
+    """Columnar batch of feature dicts, laid out in model column order"""
+
+    def __init__(self, features_list):
+        self.features_list = list(features_list)
+        n = len(self.features_list)
+        self.valid = np.fromiter(
+            (f.get("age") is not None for f in self.features_list), dtype=bool, count=n
+        )
+        self.columns = {
+            name: np.fromiter(
+                (f.get(name, 0) or 0 for f in self.features_list), dtype=np.float64, count=n
+            )
+            for name in FEATURE_ORDER
+        }
 
-    X = np.array([[ 
-        features.get("income", 0),
-        features.get("employment_years", 0),
-        features.get("age", 0),
-        features.get("net_worth", 0),
-        features.get("family_size", 0),
-    ]])
+    def __len__(self):
+        return len(self.features_list)
 
-    prediction = model.predict(X)[0]
-    prob = model.predict_proba(X)[0][1]
+    def to_array(self, valid_only=True):
+        """Stack the columns into an (n_rows, n_features) matrix"""
+        X = np.column_stack([self.columns[name] for name in FEATURE_ORDER])
+        return X[self.valid] if valid_only else X
 
-    if prediction == 1:
+
+def _format_decision(label, prob):
+    if label == 1:
         return f" Approved (ML Model, Confidence: {prob:.2f})"
     else:
         return f" Declined (ML Model, Confidence: {prob:.2f})"
 
 
+def predict_proba(X):
+    """Class probabilities and class labels from the configured inference backend"""
+    if INFERENCE_BACKEND == "compiled" and len(X) <= COMPILED_MAX_ROWS:
+        # Labels from the forest header: with ELIGIBILITY_MODEL_MMAP=1 the sklearn
+        # model is then only loaded for large batches and explanations
+        forest = get_registry().compiled_forest()
+        return forest.predict_proba(X), forest.classes_
+    model = get_model()
+    return model.predict_proba(X), model.classes_
+
+
+def warm_model():
+    """warm_start for the configured backend (the compiled one just maps its forest)"""
+    if INFERENCE_BACKEND != "compiled":
+        return warm_start()
+    try:
+        get_registry().compiled_forest()
+    except Exception as e:
+        print(f" Model warm start failed: {e}")
+
+
+def check_eligibility_batch(features_list, return_proba=False):
+    """
+    Score many applicants with a single predict_proba call.
+    Returns one decision string per input, in the same order; with
+    return_proba=True also the positive-class probabilities (NaN where the ID
+    was invalid) so explanations can reuse them.
+    """
+    matrix = features_list if isinstance(features_list, FeatureMatrix) else FeatureMatrix(features_list)
+    decisions = [" ID Card Not Valid (DOB missing in OCR)"] * len(matrix)
+    positive = np.full(len(matrix), np.nan)
+
+    if matrix.valid.any():
+        proba, classes = predict_proba(matrix.to_array())
+        # Same label predict() would give, without a second pass over the trees
+        labels = classes.take(np.argmax(proba, axis=1))
+        for i, label, prob in zip(np.flatnonzero(matrix.valid), labels, proba[:, 1]):
+            decisions[i] = _format_decision(label, prob)
+        positive[matrix.valid] = proba[:, 1]
+
+    if return_proba:
+        return decisions, positive
+    return decisions
+
+
+def ml_check_eligibility(features):
+    return check_eligibility_batch([features])[0]
+
+
 # -------- Wrapper --------
 def check_eligibility(features):
     return ml_check_eligibility(features)
@@ -1,15 +1,17 @@
-from langsmith.evaluation import evaluate
+from offline_eval import MAX_DEBT, main
 
 def eligibility_check(example, prediction):
-    decision = prediction.get("decision", "")
+    """
+    Per-prediction check (LangSmith evaluator signature). For whole datasets
+    use offline_eval, which runs the same rule vectorized and locally.
+    """
+    decision = str(prediction.get("decision", "")).lower()
     features = prediction.get("features", {})
 
-    if decision == "APPROVED" and features.get("loan", 0) < -100000:
-        return {"score": 0, "reason": "Loan too high but approved"}
+    # build_features has no "loan"; debts show up as negative net worth
+    if "approved" in decision and (features.get("net_worth") or 0) < -MAX_DEBT:
+        return {"score": 0, "reason": "Debt too high but approved"}
     return {"score": 1, "reason": "Decision seems valid"}
 
 if __name__ == "__main__":
-    evaluate(
-        project_name="default",
-        evaluator=eligibility_check
-    )
+    main()
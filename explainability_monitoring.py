@@ -1,83 +1,133 @@
 import json
-import datetime
-import os
-from sklearn.inspection import permutation_importance
-import joblib
 import numpy as np
+from model_registry import get_model, get_registry
+from eligibility import FeatureMatrix
+from decision_log import decision_log
+
+FEATURE_NAMES = ["Income", "Employment Years", "Age", "Net Worth", "Family Size"]
+
+# --- Tree-path tables (built once per loaded model) ---
+class ForestPaths:
+    """
+    Per-node lookup tables for TreeInterpreter-style explanations of a
+    RandomForestClassifier. For every non-root node we store how much the
+    positive-class probability changed when the path entered it, filed under
+    the feature its parent split on; summing those along an applicant's
+    decision paths gives per-feature contributions.
+    """
+
+    def __init__(self, model, positive_class=1):
+        from scipy import sparse  # ~150 ms to import; only needed once a model is explained
+
+        self.n_trees = len(model.estimators_)
+        n_features = model.n_features_in_
+        class_idx = list(model.classes_).index(positive_class)
+
+        rows, cols, deltas, root_probs = [], [], [], []
+        offset = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            value = tree.value[:, 0, :]
+            prob = value[:, class_idx] / value.sum(axis=1)
+
+            internal = np.flatnonzero(tree.children_left >= 0)
+            parent = np.full(tree.node_count, -1)
+            parent[tree.children_left[internal]] = internal
+            parent[tree.children_right[internal]] = internal
+            child = np.flatnonzero(parent >= 0)
+
+            rows.append(child + offset)
+            cols.append(tree.feature[parent[child]])
+            deltas.append(prob[child] - prob[parent[child]])
+            root_probs.append(prob[0])
+            offset += tree.node_count
+
+        # (all nodes of all trees) x features, matching decision_path's column layout
+        self.deltas = sparse.csr_matrix(
+            (np.concatenate(deltas), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(offset, n_features),
+        )
+        self.bias = float(np.mean(root_probs))
+        self.global_importance = model.feature_importances_
+        self.importance_order = np.argsort(-self.global_importance)
+
+    def contributions(self, model, X):
+        """(n_samples, n_features) contributions; bias + row sum = positive-class probability"""
+        indicator, _ = model.decision_path(X)
+        return np.asarray((indicator @ self.deltas).todense()) / self.n_trees
+
+
+def get_forest_paths():
+    return get_registry().derived("forest_paths", ForestPaths)
 
-# Load ML Model
-MODEL_PATH = "eligibility_model.pkl"
-model = joblib.load(MODEL_PATH)
 
 # --- Explainability ---
-def explain_decision(features):
+def explain_decisions(features_list, proba=None):
     """
-    Generate explainability report:
-    - Feature contributions
-    - Why decision is taken
+    Explainability reports for a batch of applicants:
+    - per-applicant feature contributions (walks every tree's decision path once)
+    - why each decision is taken
+    `proba` (positive-class probabilities from check_eligibility_batch's
+    return_proba) is reused when given. Applicants without a valid ID were
+    never scored; they get a report with prediction/confidence None.
     """
-    X = np.array([[
-        features.get("income", 0),
-        features.get("employment_years", 0),
-        features.get("age", 0),
-        features.get("net_worth", 0),
-        features.get("family_size", 0),
-    ]])
-
-    # Predict
-    prediction = model.predict(X)[0]
-    prob = model.predict_proba(X)[0][1]
-
-    # Get feature importances (global model level)
-    global_importance = model.feature_importances_
-    feature_names = ["Income", "Employment Years", "Age", "Net Worth", "Family Size"]
-
-    # Pair feature names with values & importance
-    explain_dict = {
-        "prediction": int(prediction),
-        "confidence": round(float(prob), 3),
-        "features": {
-            name: {
-                "value": float(val),
-                "importance": round(float(imp), 3),
+    matrix = FeatureMatrix(features_list)
+    reports = [{"prediction": None, "confidence": None, "reason": "ID Card Not Valid (DOB missing in OCR)"}
+               for _ in range(len(matrix))]
+    if not matrix.valid.any():
+        return reports
+
+    model = get_model()
+    paths = get_forest_paths()
+    X = matrix.to_array()
+    contrib = paths.contributions(model, X)
+    own = paths.bias + contrib.sum(axis=1)
+    if proba is not None:
+        proba = np.asarray(proba, dtype=np.float64)[matrix.valid]
+        own = np.where(np.isnan(proba), own, proba)
+
+    for i, row, row_contrib, prob in zip(np.flatnonzero(matrix.valid), X, contrib, own):
+        prediction = int(prob > 0.5)
+        explain_dict = {
+            "prediction": prediction,
+            "confidence": round(float(prob), 3),
+            "base_value": round(paths.bias, 3),
+            "features": {
+                name: {
+                    "value": float(val),
+                    "importance": round(float(imp), 3),
+                    "contribution": round(float(c), 3),
+                }
+                for name, val, imp, c in zip(FEATURE_NAMES, row, paths.global_importance, row_contrib)
             }
-            for name, val, imp in zip(feature_names, X[0], global_importance)
         }
-    }
 
-    # Human-readable reason
-    if prediction == 1:
-        explain_dict["reason"] = "Application approved. Key positive factors: " + \
-            ", ".join([f for f, imp in sorted(zip(feature_names, global_importance), key=lambda x: -x[1])[:2]])
-    else:
-        explain_dict["reason"] = "Application declined. Weak areas in: " + \
-            ", ".join([f for f, imp in sorted(zip(feature_names, global_importance), key=lambda x: -x[1])[-2:]])
+        # Human-readable reason from this applicant's own contributions
+        order = np.argsort(-row_contrib)
+        if prediction == 1:
+            explain_dict["reason"] = "Application approved. Key positive factors: " + \
+                ", ".join(FEATURE_NAMES[j] for j in order[:2])
+        else:
+            explain_dict["reason"] = "Application declined. Weak areas in: " + \
+                ", ".join(FEATURE_NAMES[j] for j in order[::-1][:2])
+        reports[i] = explain_dict
 
-    return explain_dict
+    return reports
 
 
-# --- Monitoring ---
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
+def explain_decision(features, proba=None):
+    """Explainability report for one applicant (see explain_decisions)"""
+    return explain_decisions([features], proba=None if proba is None else [proba])[0]
 
+
+# --- Monitoring ---
 def log_application(user_id, features, decision, explain_report):
     """
-    Save logs for monitoring & admin check
+    Append the decision to the decision log for monitoring & admin check
+    (see decision_log.decision_log.query to read it back)
     """
-    log_entry = {
-        "timestamp": datetime.datetime.now().isoformat(),
-        "user_id": user_id,
-        "features": features,
-        "decision": decision,
-        "explainability": explain_report,
-    }
-
-    log_path = os.path.join(LOG_DIR, f"{user_id}_log.json")
-    with open(log_path, "w", encoding="utf-8") as f:
-        json.dump(log_entry, f, indent=4)
-
-    print(f" Log saved at {log_path}")
-    return log_path
+    decision_log.log(user_id, features, decision, explain_report)
+    return decision_log.writer.path
 
 
 # --- Example Run ---
@@ -0,0 +1,104 @@
+# feature_registry.py
+import time
+
+
+class Extractor:
+    """One declared feature: the raw inputs it reads and the features it needs first"""
+
+    def __init__(self, name, func, inputs=(), depends=(), default=0, gate=False):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.depends = tuple(depends)
+        self.default = default
+        # A gate returning None makes the application invalid; with short_circuit
+        # nothing after it is computed (so its documents are never read) and
+        # those features are None rather than their defaults
+        self.gate = gate
+
+
+class FeatureInputs:
+    """What an extractor sees: its declared inputs (stringified at most once) and earlier features"""
+
+    def __init__(self, data, features, text_cache, allowed):
+        self._data = data
+        self._text_cache = text_cache
+        self._allowed = allowed
+        self.features = features
+
+    def _check(self, key):
+        if key not in self._allowed:
+            raise KeyError(f"input '{key}' not declared by this extractor")
+
+    def has(self, key):
+        self._check(key)
+        return key in self._data
+
+    def raw(self, key):
+        self._check(key)
+        return self._data[key]
+
+    def text(self, key):
+        self._check(key)
+        if key not in self._text_cache:
+            self._text_cache[key] = str(self._data[key])
+        return self._text_cache[key]
+
+
+class FeatureRegistry:
+    def __init__(self):
+        self.extractors = {}
+        self._order = None
+
+    def register(self, name, inputs=(), depends=(), default=0, gate=False):
+        """Decorator: func(inputs: FeatureInputs) -> feature value"""
+        def decorator(func):
+            self.extractors[name] = Extractor(name, func, inputs, depends, default, gate)
+            self._order = None
+            return func
+        return decorator
+
+    def order(self):
+        """Dependency order; gates (and what they depend on) come first"""
+        if self._order is None:
+            ordered, visiting = [], set()
+
+            def visit(name):
+                if name in ordered:
+                    return
+                if name in visiting:
+                    raise ValueError(f"feature dependency cycle at '{name}'")
+                visiting.add(name)
+                for dep in self.extractors[name].depends:
+                    visit(dep)
+                visiting.discard(name)
+                ordered.append(name)
+
+            for ex in self.extractors.values():
+                if ex.gate:
+                    visit(ex.name)
+            for name in self.extractors:
+                visit(name)
+            self._order = [self.extractors[name] for name in ordered]
+        return self._order
+
+    def evaluate(self, data, short_circuit=False, timings=None):
+        """
+        Compute every feature in dependency order. Per-extractor wall time
+        (including any lazy document read it triggered) goes into `timings`.
+        Returns features in registration order; ones skipped by short_circuit are None.
+        """
+        features = {}
+        text_cache = {}
+        stopped = False
+        for ex in self.order():
+            if stopped:
+                features[ex.name] = None  # not computed, unlike a real 0
+                continue
+            start = time.perf_counter()
+            features[ex.name] = ex.func(FeatureInputs(data, features, text_cache, ex.inputs))
+            if timings is not None:
+                timings[ex.name] = time.perf_counter() - start
+            if ex.gate and short_circuit and features[ex.name] is None:
+                stopped = True
+        return {name: features[name] for name in self.extractors}
@@ -0,0 +1,107 @@
+# forest_engine.py
+import json
+import os
+import numpy as np
+
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier flattened into contiguous NumPy arrays.
+    All trees are walked together, one vectorised step per depth level, so a
+    single row costs a few dozen array operations instead of sklearn's input
+    validation and per-estimator dispatch. predict_proba matches sklearn's.
+    """
+
+    def __init__(self, model):
+        self.classes_ = model.classes_
+        self.n_features_in_ = model.n_features_in_
+        self.n_trees = len(model.estimators_)
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        self.max_depth = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            idx = np.arange(tree.node_count)
+            leaf = tree.children_left < 0
+
+            # Leaves loop back to themselves, so every row can take max_depth steps
+            left = np.where(leaf, idx, tree.children_left)
+            right = np.where(leaf, idx, tree.children_right)
+            feature = np.where(leaf, 0, tree.feature)
+            threshold = np.where(leaf, np.inf, tree.threshold)
+
+            value = tree.value[:, 0, :]
+            normalizer = value.sum(axis=1, keepdims=True)
+            # Older sklearn stores class counts (normalised at predict time);
+            # newer versions already store fractions and use them as-is.
+            if normalizer[0, 0] > 1 + 1e-9:
+                normalizer[normalizer == 0.0] = 1.0
+                value = value / normalizer
+
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(left + offset)
+            rights.append(right + offset)
+            values.append(value)
+            roots.append(offset)
+            offset += tree.node_count
+            self.max_depth = max(self.max_depth, tree.max_depth)
+
+        self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+        self.left = np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp)
+        self.right = np.ascontiguousarray(np.concatenate(rights), dtype=np.intp)
+        self.value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+
+    # --- Persistence (memory-mappable) ---
+    ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+    def save(self, directory):
+        """One .npy per flat array plus a small JSON header"""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "header.json"), "w", encoding="utf-8") as f:
+            json.dump({"classes": self.classes_.tolist(), "n_features_in": int(self.n_features_in_),
+                       "max_depth": int(self.max_depth)}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        """
+        Forest saved by save(). With mmap_mode="r" the arrays stay in the page
+        cache, so every process that loads the same directory shares them.
+        """
+        forest = cls.__new__(cls)
+        with open(os.path.join(directory, "header.json"), encoding="utf-8") as f:
+            header = json.load(f)
+        forest.classes_ = np.asarray(header["classes"])
+        forest.n_features_in_ = header["n_features_in"]
+        forest.max_depth = header["max_depth"]
+        for name in cls.ARRAYS:
+            array = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            # Plain ndarray view of the mapping: indexing skips np.memmap's subclass overhead
+            setattr(forest, name, array.view(np.ndarray))
+        forest.n_trees = len(forest.roots)
+        return forest
+
+    def apply(self, X):
+        """Leaf node index (into the flat arrays) per row and tree: (n_samples, n_trees)"""
+        # sklearn compares float32 inputs against float64 thresholds; do the same
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.tile(self.roots, (X.shape[0], 1))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_proba(self, X):
+        # Sum over trees in estimator order, then divide: the same arithmetic as sklearn
+        return self.value[self.apply(X)].sum(axis=1) / self.n_trees
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
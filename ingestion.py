@@ -1,59 +1,238 @@
-import pandas as pd
-import fitz  # PyMuPDF for PDF
-import pytesseract
-from PIL import Image
-import docx
+import asyncio
+import io
+import os
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import re
+from ingestion_cache import cached_reader
+from statement_parser import statement_text
+from asset_parser import iter_rows
+# PyMuPDF, Pillow, python-docx and the OCR pipeline (pytesseract) are imported
+# inside the readers, so importing this module doesn't load them
 
-# --- Set Tesseract Path (Windows default installation) ---
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+# --- Document Sources ---
+# Every reader takes a file path, the document's bytes (bytes / bytearray /
+# memoryview) or a binary file-like object such as an upload. In-memory
+# documents never touch the disk.
+BUFFER_TYPES = (bytes, bytearray, memoryview)
+
+def as_source(source):
+    """A path, or the document's bytes (a zero-copy view where the object offers one)"""
+    if isinstance(source, BUFFER_TYPES) or isinstance(source, (str, os.PathLike)):
+        return source
+    if hasattr(source, "getbuffer"):  # BytesIO, Streamlit UploadedFile
+        return source.getbuffer()
+    if hasattr(source, "read"):
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return source.read()
+    raise TypeError(f"unsupported document source: {type(source).__name__}")
+
+def _open(source):
+    """Something the parsing libraries can open: the path itself, or a BytesIO over the bytes"""
+    return io.BytesIO(source) if isinstance(source, BUFFER_TYPES) else source
 
 # --- Excel Reader ---
-def read_excel(path):
+@cached_reader("excel", version=3)
+def _read_excel(source):
+    # List of row dicts (the API's excel_assets shape), streamed by openpyxl in
+    # read-only mode. Per call this is no faster than pd.read_excel (and peaks a
+    # little higher); what it saves is importing pandas (~350 ms) in each worker.
+    return list(iter_rows(_open(source)))
+
+def read_excel(source):
     try:
-        df = pd.read_excel(path)
-        return df.to_dict(orient="records")
+        return _read_excel(as_source(source))
     except Exception as e:
         return {"error": str(e)}
 
 # --- PDF Reader ---
-def read_pdf(path):
+# "1": stop extracting at the page with the first Salary line (all the features
+# need). Off by default: pdf_bank is also the statement shown in the /evaluate
+# response and the Streamlit preview, and the balance evidence the LLM reads.
+PDF_STOP_AT_SALARY = os.getenv("PDF_STOP_AT_SALARY", "0") == "1"
+
+@cached_reader("pdf", version=2 if PDF_STOP_AT_SALARY else 1)
+def _read_pdf(source):
+    # Pages are extracted one at a time (statement_parser.statement_text)
+    return statement_text(source, stop_at_salary=PDF_STOP_AT_SALARY)
+
+def read_pdf(source):
     try:
-        text = ""
-        with fitz.open(path) as doc:
-            for page in doc:
-                text += page.get_text()
-        return text.strip()
+        return _read_pdf(as_source(source))
     except Exception as e:
         return f"PDF read error: {e}"
 
 # --- Image Reader (OCR) ---
-def read_image(path):
+@cached_reader("image", version=2)
+def _read_image(source):
+    from PIL import Image
+    from ocr_pipeline import ocr_emirates_id
+
+    # Downscaled, binarized, and only the DOB / ID number regions (see ocr_pipeline)
+    with Image.open(_open(source)) as img:
+        return ocr_emirates_id(img)
+
+def read_image(source):
     try:
-        img = Image.open(path)
-        text = pytesseract.image_to_string(img)
-        return text.strip()
+        return _read_image(as_source(source))
     except Exception as e:
         return f"Image OCR failed: {e}"
 
 # --- DOCX Reader ---
-def read_docx(path):
+@cached_reader("docx", version=1)
+def _read_docx(source):
+    import docx
+
+    doc = docx.Document(_open(source))
+    text = "\n".join([p.text for p in doc.paragraphs])
+    return text.strip()
+
+def read_docx(source):
     try:
-        doc = docx.Document(path)
-        text = "\n".join([p.text for p in doc.paragraphs])
-        return text.strip()
+        return _read_docx(as_source(source))
     except Exception as e:
         return f"DOCX read error: {e}"
 
+# --- Shared Reader Pool ---
+# Tesseract runs as a subprocess and PyMuPDF releases the GIL, so the other
+# readers make progress on threads while OCR is busy.
+MAX_READER_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "8"))
+READER_TIMEOUT = float(os.getenv("INGEST_READER_TIMEOUT", "60"))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_reader_pool():
+    """Process-wide bounded pool shared by every concurrent ingestion"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        # A forked process (e.g. a fork-started scoring worker) inherits the pool
+        # object but not its threads: start its own instead of waiting forever
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPoolExecutor(max_workers=MAX_READER_WORKERS, thread_name_prefix="ingest")
+            _pool_pid = os.getpid()
+    return _pool
+
+def _reset_pool_lock():
+    # Another thread may have held the lock at fork time
+    global _pool_lock
+    _pool_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool_lock)
+
+# output key -> (reader, error result in that reader's own format)
+READERS = {
+    "excel_assets": (read_excel, lambda msg: {"error": msg}),
+    "pdf_bank": (read_pdf, lambda msg: f"PDF read error: {msg}"),
+    "image_id": (read_image, lambda msg: f"Image OCR failed: {msg}"),
+    "docx_resume": (read_docx, lambda msg: f"DOCX read error: {msg}"),
+}
+
+# output key -> stage name used for timings / metrics
+READER_STAGES = {"excel_assets": "excel", "pdf_bank": "pdf", "image_id": "ocr", "docx_resume": "docx"}
+
+def _timed_reader(key, timings):
+    """The reader for `key`, recording its seconds into timings[stage] when timings is a dict"""
+    reader = READERS[key][0]
+    if timings is None:
+        return reader
+
+    def run(path):
+        start = time.perf_counter()
+        try:
+            return reader(path)
+        finally:
+            timings[READER_STAGES[key]] = time.perf_counter() - start
+    return run
+
+def _reader_jobs(excel_path, pdf_path, img_path, resume_path):
+    paths = {
+        "excel_assets": excel_path,
+        "pdf_bank": pdf_path,
+        "image_id": img_path,
+        "docx_resume": resume_path,
+    }
+    return [(key, path) for key, path in paths.items() if path]
+
+# --- Lazy Ingestion ---
+class LazyDocuments(Mapping):
+    """
+    Same keys as ingest_all's result, but each document is read on first
+    access, so documents a caller never looks at are never parsed.
+    """
+
+    def __init__(self, excel_path=None, pdf_path=None, img_path=None, resume_path=None):
+        self._paths = dict(_reader_jobs(excel_path, pdf_path, img_path, resume_path))
+        self._values = {}
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            self._values[key] = READERS[key][0](self._paths[key])
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, key):
+        return key in self._paths
+
+    def loaded(self):
+        """Only the documents that were actually read"""
+        return dict(self._values)
+
+def ingest_lazy(excel_path=None, pdf_path=None, img_path=None, resume_path=None):
+    return LazyDocuments(excel_path, pdf_path, img_path, resume_path)
+
 # --- Ingest All ---
-def ingest_all(excel_path=None, pdf_path=None, img_path=None, resume_path=None):
+def ingest_all(excel_path=None, pdf_path=None, img_path=None, resume_path=None,
+               parallel=False, timeout=READER_TIMEOUT, timings=None):
+    """
+    Read every provided document into one dict. Each argument is a path or
+    an in-memory document (bytes / memoryview / file-like, see as_source).
+    With parallel=True the readers run concurrently on the shared pool and a
+    reader that exceeds `timeout` seconds is reported as a read error.
+    Per-reader seconds go into `timings` (keyed by READER_STAGES) if given.
+    """
+    jobs = _reader_jobs(excel_path, pdf_path, img_path, resume_path)
+    if not parallel:
+        return {key: _timed_reader(key, timings)(path) for key, path in jobs}
+
+    pool = get_reader_pool()
+    futures = [(key, pool.submit(_timed_reader(key, timings), path)) for key, path in jobs]
+    # All readers start together, so each one's timeout runs from submission
+    deadline = time.monotonic() + timeout
+
     data = {}
-    if excel_path:
-        data["excel_assets"] = read_excel(excel_path)
-    if pdf_path:
-        data["pdf_bank"] = read_pdf(pdf_path)
-    if img_path:
-        data["image_id"] = read_image(img_path)
-    if resume_path:
-        data["docx_resume"] = read_docx(resume_path)
+    for key, future in futures:
+        try:
+            data[key] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            # Can't interrupt a running reader; drop its result when it finishes
+            future.cancel()
+            data[key] = READERS[key][1](f"timed out after {timeout}s")
     return data
+
+async def ingest_all_async(excel_path=None, pdf_path=None, img_path=None, resume_path=None,
+                           timeout=READER_TIMEOUT):
+    """Awaitable ingest_all for async handlers; readers run on the shared pool"""
+    loop = asyncio.get_running_loop()
+    pool = get_reader_pool()
+
+    async def run(key, path):
+        reader, on_error = READERS[key]
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(pool, reader, path), timeout)
+        except asyncio.TimeoutError:
+            return on_error(f"timed out after {timeout}s")
+
+    jobs = _reader_jobs(excel_path, pdf_path, img_path, resume_path)
+    results = await asyncio.gather(*(run(key, path) for key, path in jobs))
+    return {key: result for (key, _), result in zip(jobs, results)}
@@ -0,0 +1,195 @@
+# ingestion_cache.py
+import datetime
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+# --- Settings (env overridable) ---
+CACHE_ENABLED = os.getenv("INGEST_CACHE", "1") != "0"
+# Absolute, so the cache doesn't move with the working directory
+CACHE_DIR = os.path.abspath(os.getenv(
+    "INGEST_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "ingestion")))
+MEMORY_ENTRIES = int(os.getenv("INGEST_CACHE_ENTRIES", "256"))
+DISK_MAX_BYTES = int(os.getenv("INGEST_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_CHUNK = 1024 * 1024
+
+# --- Content Hash ---
+def content_hash(source):
+    """SHA-256 of a document's bytes; `source` is a file path or raw bytes"""
+    h = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        h.update(source)
+    else:
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+# --- Two-tier Cache ---
+class IngestionCache:
+    """
+    In-memory LRU in front of an on-disk JSON store (JSON is never executed on
+    load, unlike pickle). Values must be JSON-shaped (see to_json_value).
+    Disk entries are evicted oldest-used first once the directory
+    grows past max_disk_bytes.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MEMORY_ENTRIES, max_disk_bytes=DISK_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Return (found, value)"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return True, self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # mark as recently used for disk eviction
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return False, None
+
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            self._remember(key, value)
+        return True, value
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+        except (OSError, TypeError, ValueError) as e:
+            print(" Ingestion cache write failed:", e)
+        finally:
+            # Never leave a partial write behind (eviction only counts *.json)
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                # *.tmp: writes orphaned by a killed process (oldest first, so
+                # an in-flight write is the last thing to go)
+                if entry.name.endswith((".json", ".tmp")):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+        if total <= self.max_disk_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith((".json", ".tmp")):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def add_stats(self, counts):
+        """Fold in lookups counted in another process (e.g. a pool worker's per-call delta)"""
+        with self._lock:
+            for name, count in counts.items():
+                self.stats[name] = self.stats.get(name, 0) + count
+
+    def hit_ratio(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def report(self):
+        return {**self.stats, "hit_ratio": round(self.hit_ratio(), 3), "memory_entries": len(self._memory)}
+
+
+cache = IngestionCache()
+
+
+# --- JSON normalisation ---
+def _json_default(value):
+    # openpyxl returns these for date cells
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def to_json_value(value):
+    """
+    `value` as it reads back from disk: dates become ISO strings, tuples lists,
+    non-string keys strings. Cached in this form, memory and disk hits return
+    the same thing. Raises TypeError for anything else JSON can't hold.
+    """
+    return json.loads(json.dumps(value, default=_json_default))
+
+
+# --- Reader Decorator ---
+def cached_reader(kind, version):
+    """
+    Cache a reader's result by (kind, version, content hash).
+    Bump `version` whenever the reader's output changes so stale entries are skipped.
+    Results are normalised with to_json_value; ones JSON can't hold are
+    returned uncached. Exceptions raised by the reader are never cached.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(source):
+            if not CACHE_ENABLED:
+                return func(source)
+            key = f"{kind}-v{version}-{content_hash(source)}"
+            found, value = cache.get(key)
+            if found:
+                return value
+            value = func(source)
+            try:
+                value = to_json_value(value)
+            except (TypeError, ValueError):
+                return value
+            cache.put(key, value)
+            return value
+
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
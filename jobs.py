@@ -0,0 +1,216 @@
+# jobs.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# --- Settings (env overridable) ---
+JOBS_DB = os.getenv("JOBS_DB", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Finished jobs older than this are purged on start (seconds)
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(7 * 24 * 3600)))
+# A running job whose heartbeat is older than this (seconds) is assumed orphaned
+# by a dead process and re-queued; live workers refresh it every JOB_LEASE / 3
+JOB_LEASE = float(os.getenv("JOB_LEASE", "60"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, created_at);
+"""
+
+
+class JobQueue:
+    """
+    SQLite-backed background job queue.
+    Jobs run on a fixed number of worker threads, highest priority first,
+    then oldest first. Several processes may share one database: a running
+    job's updated_at is its heartbeat, and only jobs whose heartbeat lapsed
+    past `lease` (their process died) are re-queued.
+    """
+
+    def __init__(self, db_path=JOBS_DB, workers=JOB_WORKERS, poll_interval=0.5, lease=JOB_LEASE):
+        self.db_path = db_path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.handlers = {}
+        self._local = threading.local()
+        self._wake = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self._running = set()  # ids of jobs this process is running
+        self._running_lock = threading.Lock()
+
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def register(self, kind, handler):
+        """handler(payload) -> JSON-serialisable result"""
+        self.handlers[kind] = handler
+
+    # --- Client API ---
+    def submit(self, kind, payload, priority=0):
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO jobs (id, kind, status, priority, payload, created_at, updated_at) "
+            "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, kind, priority, json.dumps(payload), now, now),
+        )
+        with self._wake:
+            self._wake.notify()
+        return job_id
+
+    def get(self, job_id):
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "priority": row["priority"],
+            "result": json.loads(row["result"]) if row["result"] is not None else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def wait(self, job_id, timeout=None, interval=0.25):
+        """Block until the job is done or failed (or timeout); returns the job dict"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in ("done", "failed"):
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(interval)
+
+    # --- Workers ---
+    def start(self):
+        if self._threads:
+            return
+        conn = self._conn()
+        self.requeue_stale()
+        conn.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+            (time.time() - JOB_RETENTION,),
+        )
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def requeue_stale(self):
+        """Re-queue running jobs whose heartbeat is older than the lease; returns how many"""
+        now = time.time()
+        cur = self._conn().execute(
+            "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running' AND updated_at < ?",
+            (now, now - self.lease),
+        )
+        if cur.rowcount:
+            print(f" Re-queued {cur.rowcount} orphaned job(s)")
+        return cur.rowcount
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        with self._wake:
+            self._wake.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def _claim(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, kind, payload FROM jobs WHERE status = 'queued' "
+                "ORDER BY priority DESC, created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?",
+                    (time.time(), row["id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.lease / 3):
+            try:
+                with self._running_lock:
+                    running = list(self._running)
+                if running:
+                    self._conn().execute(
+                        f"UPDATE jobs SET updated_at = ? WHERE status = 'running' "
+                        f"AND id IN ({','.join('?' * len(running))})",
+                        (time.time(), *running),
+                    )
+                # Pick up jobs from workers that died since start()
+                self.requeue_stale()
+            except sqlite3.Error as e:
+                print(" Job queue heartbeat error:", e)
+
+    def _finish(self, job_id, status, result=None, error=None):
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+        )
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                row = self._claim()
+            except sqlite3.Error as e:
+                print(" Job queue error:", e)
+                row = None
+            if row is None:
+                with self._wake:
+                    self._wake.wait(self.poll_interval)
+                continue
+
+            handler = self.handlers.get(row["kind"])
+            if handler is None:
+                self._finish(row["id"], "failed", error=f"No handler for job kind '{row['kind']}'")
+                continue
+            with self._running_lock:
+                self._running.add(row["id"])
+            try:
+                result = handler(json.loads(row["payload"]))
+                self._finish(row["id"], "done", result=result)
+            except Exception as e:
+                self._finish(row["id"], "failed", error=str(e))
+            finally:
+                with self._running_lock:
+                    self._running.discard(row["id"])
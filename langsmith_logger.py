@@ -1,21 +1,21 @@
-import os
-from langsmith import Client
+from tracing import get_exporter, start_trace
 
-# LangSmith client using API key from env
-client = Client(api_key=os.getenv("LANGSMITH_API_KEY"))
+PIPELINE_NAME = "EligibilityPipeline"
+
+def start_pipeline_trace(user_id: str):
+    """
+    One parent run per evaluation; add steps with trace.span(step, output)
+    and finish with trace.end(). Exported in the background.
+    """
+    return start_trace(PIPELINE_NAME, inputs={"user_id": user_id}, metadata={"project": "social-support-ai"})
 
 def log_trace(user_id: str, step: str, state: dict):
     """
-    Log pipeline steps to LangSmith for observability
+    Log a single pipeline step for observability (queued, never blocks on the network)
     """
-    try:
-        client.create_run(
-            name="EligibilityPipeline",
-            inputs={"user_id": user_id, "step": step},
-            outputs={"state": state},
-            metadata={"project": "social-support-ai"},
-            run_type="chain"   # Required field (could be "llm" / "tool" also)
-        )
-        print(f" Logged to LangSmith: {step}")
-    except Exception as e:
-        print(f" LangSmith log failed: {e}")
+    trace = start_pipeline_trace(user_id)
+    trace.span(step, state, inputs={"user_id": user_id, "step": step})
+    trace.end()
+
+def trace_stats():
+    return dict(get_exporter().stats)
@@ -0,0 +1,279 @@
+# llm_client.py
+import json
+import os
+import threading
+import time
+
+# requests / httpx are imported where used, so importing this module stays cheap
+
+# --- Settings (env overridable) ---
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "2"))
+READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "120"))
+HEALTH_TTL = float(os.getenv("OLLAMA_HEALTH_TTL", "10"))
+POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+BREAKER_THRESHOLD = int(os.getenv("OLLAMA_BREAKER_THRESHOLD", "3"))
+BREAKER_COOLDOWN = float(os.getenv("OLLAMA_BREAKER_COOLDOWN", "30"))
+
+
+class LLMError(Exception):
+    """Generation failed (timeout, HTTP error, bad response)"""
+
+
+class LLMUnavailable(LLMError):
+    """Server is down or the circuit breaker is open; nothing was sent"""
+
+
+# --- Circuit Breaker ---
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and fails fast for `cooldown`
+    seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """A call ended with no outcome (cancelled, stream closed early): free the trial slot"""
+        with self._lock:
+            self._trial_running = False
+
+
+# --- Client ---
+class OllamaClient:
+    """
+    Keep-alive client for the Ollama HTTP API, shared by sync and async callers.
+    Health probes are cached for `health_ttl` seconds.
+    """
+
+    def __init__(self, base_url=OLLAMA_URL, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, health_ttl=HEALTH_TTL, pool_size=POOL_SIZE):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.health_ttl = health_ttl
+        self.pool_size = pool_size
+        self.breaker = CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._async_client = None
+
+        self._healthy = False
+        self._health_checked_at = None
+
+    # --- Health ---
+    def _health_fresh(self):
+        return self._health_checked_at is not None and time.monotonic() - self._health_checked_at < self.health_ttl
+
+    def _set_health(self, healthy):
+        self._healthy = healthy
+        self._health_checked_at = time.monotonic()
+
+    def is_healthy(self, force=False):
+        import requests
+        if force or not self._health_fresh():
+            try:
+                r = self.session.get(self.base_url, timeout=(self.connect_timeout, self.connect_timeout))
+                self._set_health(r.status_code == 200)
+            except requests.RequestException:
+                self._set_health(False)
+        return self._healthy
+
+    async def ais_healthy(self, force=False):
+        import httpx
+        if force or not self._health_fresh():
+            try:
+                r = await self._get_async_client().get("/", timeout=self.connect_timeout)
+                self._set_health(r.status_code == 200)
+            except httpx.HTTPError:
+                self._set_health(False)
+        return self._healthy
+
+    # --- Generation ---
+    def _chat_body(self, prompt, model, system, stream=False):
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        return {"model": model, "messages": messages, "stream": stream}
+
+    def _check_available(self, healthy):
+        if not healthy:
+            raise LLMUnavailable("Ollama server not running")
+
+    def _allow(self):
+        if not self.breaker.allow():
+            raise LLMUnavailable("Ollama circuit open after repeated errors, retry later")
+
+    def _failed(self, e):
+        self.breaker.record_failure()
+        self._health_checked_at = None  # re-probe on the next call
+        raise LLMError(str(e)) from e
+
+    def chat(self, prompt, model="gemma:2b", system=None, stats=None):
+        """Full reply text; `stats` (a dict) receives the response counters like chat_stream's"""
+        import requests
+        self._check_available(self.is_healthy())
+        self._allow()
+        try:
+            r = self.session.post(
+                f"{self.base_url}/api/chat",
+                json=self._chat_body(prompt, model, system),
+                timeout=(self.connect_timeout, self.read_timeout),
+            )
+            r.raise_for_status()
+            body = r.json()
+            content = body["message"]["content"]
+        except (requests.RequestException, KeyError, ValueError) as e:
+            self._failed(e)
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        if stats is not None:
+            stats.update({k: v for k, v in body.items() if k not in ("message", "done")})
+        return content
+
+    def chat_stream(self, prompt, model="gemma:2b", system=None, stats=None):
+        """
+        Yield content chunks as Ollama generates them.
+        If `stats` is a dict it receives the final chunk's counters (eval_count, eval_duration, ...).
+        """
+        import requests
+        self._check_available(self.is_healthy())
+        self._allow()
+        try:
+            with self.session.post(
+                f"{self.base_url}/api/chat",
+                json=self._chat_body(prompt, model, system, stream=True),
+                timeout=(self.connect_timeout, self.read_timeout),
+                stream=True,
+            ) as r:
+                r.raise_for_status()
+                for line in r.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    content = chunk.get("message", {}).get("content")
+                    if content:
+                        yield content
+                    if chunk.get("done") and stats is not None:
+                        stats.update({k: v for k, v in chunk.items() if k not in ("message", "done")})
+        except (requests.RequestException, ValueError) as e:
+            self._failed(e)
+        except BaseException:
+            # GeneratorExit when the consumer stops early (client disconnect, UI rerun)
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+
+    def _get_async_client(self):
+        import httpx
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        return self._async_client
+
+    async def achat(self, prompt, model="gemma:2b", system=None, stats=None):
+        import httpx
+        self._check_available(await self.ais_healthy())
+        self._allow()
+        try:
+            r = await self._get_async_client().post("/api/chat", json=self._chat_body(prompt, model, system))
+            r.raise_for_status()
+            body = r.json()
+            content = body["message"]["content"]
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            self._failed(e)
+        except BaseException:
+            # e.g. asyncio.CancelledError
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        if stats is not None:
+            stats.update({k: v for k, v in body.items() if k not in ("message", "done")})
+        return content
+
+    async def achat_stream(self, prompt, model="gemma:2b", system=None, stats=None):
+        """Async counterpart of chat_stream"""
+        import httpx
+        self._check_available(await self.ais_healthy())
+        self._allow()
+        try:
+            async with self._get_async_client().stream(
+                "POST", "/api/chat", json=self._chat_body(prompt, model, system, stream=True)
+            ) as r:
+                r.raise_for_status()
+                async for line in r.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    content = chunk.get("message", {}).get("content")
+                    if content:
+                        yield content
+                    if chunk.get("done") and stats is not None:
+                        stats.update({k: v for k, v in chunk.items() if k not in ("message", "done")})
+        except (httpx.HTTPError, ValueError) as e:
+            self._failed(e)
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Process-wide shared client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient()
+        return _client
@@ -0,0 +1,221 @@
+# metrics.py
+import collections
+import functools
+import os
+import sys
+import threading
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# --- Settings (env overridable) ---
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.01"))  # seconds between samples
+PROFILER_AUTOSTART = os.getenv("PROFILER_AUTOSTART", "0") == "1"
+
+# Sub-millisecond model calls up to multi-second OCR / LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# --- Pipeline stages ---
+STAGE_SECONDS = Histogram("pipeline_stage_seconds", "Time spent in each pipeline stage",
+                          ["stage"], buckets=LATENCY_BUCKETS)
+STAGE_ERRORS = Counter("pipeline_stage_errors_total", "Pipeline stage calls that raised", ["stage"])
+STAGE_IN_FLIGHT = Gauge("pipeline_stage_in_flight", "Pipeline stage calls currently running", ["stage"])
+
+# --- LangGraph nodes ---
+NODE_SECONDS = Histogram("agent_node_seconds", "Time spent in each LangGraph node",
+                         ["node"], buckets=LATENCY_BUCKETS)
+NODE_ERRORS = Counter("agent_node_errors_total", "LangGraph node calls that raised", ["node"])
+NODE_IN_FLIGHT = Gauge("agent_node_in_flight", "LangGraph node calls currently running", ["node"])
+
+# --- LLM ---
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported by Ollama", ["model", "kind"])
+LLM_TOKENS_PER_SECOND = Histogram("llm_tokens_per_second", "Generation rate per LLM call", ["model"],
+                                  buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250))
+LLM_FIRST_TOKEN_SECONDS = Histogram("llm_first_token_seconds", "Time to first streamed token", ["model"],
+                                    buckets=LATENCY_BUCKETS)
+
+
+# --- Timing helpers ---
+class _Labelled:
+    """Label children resolved once per name, so the hot path skips the label lookup"""
+
+    def __init__(self, seconds, errors, in_flight):
+        self._metrics = (seconds, errors, in_flight)
+        self._children = {}
+
+    def get(self, name):
+        children = self._children.get(name)
+        if children is None:
+            children = self._children[name] = tuple(m.labels(name) for m in self._metrics)
+        return children
+
+
+_stages = _Labelled(STAGE_SECONDS, STAGE_ERRORS, STAGE_IN_FLIGHT)
+_nodes = _Labelled(NODE_SECONDS, NODE_ERRORS, NODE_IN_FLIGHT)
+
+
+class _Track:
+    """Latency, error and in-flight bookkeeping for one call (a plain class: cheaper than @contextmanager)"""
+    __slots__ = ("seconds", "errors", "in_flight", "start")
+
+    def __init__(self, children):
+        self.seconds, self.errors, self.in_flight = children
+
+    def __enter__(self):
+        self.in_flight.inc()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds.observe(time.perf_counter() - self.start)
+        self.in_flight.dec()
+        if exc_type is not None:
+            self.errors.inc()
+        return False
+
+
+def track_stage(stage):
+    """with track_stage("ocr"): ... -> latency, errors and in-flight for that stage"""
+    return _Track(_stages.get(stage))
+
+
+def observe_stage(stage, seconds):
+    """Record a stage duration measured elsewhere (e.g. in a worker process)"""
+    _stages.get(stage)[0].observe(seconds)
+
+
+def instrument_node(node):
+    """Decorator for LangGraph node functions"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Track(_nodes.get(node)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_call(model, stats, first_token_s=None):
+    """Token counters and rate from Ollama's final response fields"""
+    prompt_tokens = stats.get("prompt_eval_count")
+    completion_tokens = stats.get("eval_count")
+    if prompt_tokens:
+        LLM_TOKENS.labels(model, "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(model, "completion").inc(completion_tokens)
+        duration_ns = stats.get("eval_duration")
+        if duration_ns:
+            LLM_TOKENS_PER_SECOND.labels(model).observe(completion_tokens / (duration_ns / 1e9))
+    if first_token_s is not None:
+        LLM_FIRST_TOKEN_SECONDS.labels(model).observe(first_token_s)
+
+
+# --- Cache hit ratios (read at scrape time, nothing on the hot path) ---
+class CacheCollector:
+    def __init__(self):
+        self.caches = {}
+
+    def watch(self, name, cache):
+        """`cache` has .stats ({hit/miss counters}) and a hit ratio via .report()"""
+        self.caches[name] = cache
+
+    def collect(self):
+        lookups = CounterMetricFamily("cache_lookups", "Cache lookups by result", labels=["cache", "result"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Hits / lookups since start", labels=["cache"])
+        for name, cache in self.caches.items():
+            report = cache.report()
+            for result, count in cache.stats.items():
+                lookups.add_metric([name, result], count)
+            ratio.add_metric([name], report.get("hit_ratio", report.get("hit_rate", 0.0)))
+        yield lookups
+        yield ratio
+
+
+cache_collector = CacheCollector()
+REGISTRY.register(cache_collector)
+
+
+def watch_cache(name, cache):
+    cache_collector.watch(name, cache)
+
+
+def render_metrics():
+    """(body, content type) for a /metrics response"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+# --- Sampling profiler ---
+class SamplingProfiler:
+    """
+    Samples every thread's Python stack each `interval` seconds from a daemon
+    thread and counts them as folded stacks ("outer;inner;leaf"), the format
+    flame graph tools read. Costs nothing while stopped; start/stop at runtime.
+    """
+
+    def __init__(self, interval=PROFILER_INTERVAL, max_depth=40):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = collections.Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=None):
+        with self._lock:
+            if self.running:
+                return False
+            if interval:
+                self.interval = interval
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        with self._lock:
+            if not self.running:
+                return False
+            self._stop.set()
+            self._thread.join()
+            return True
+
+    def reset(self):
+        self.samples.clear()
+        self.sample_count = 0
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def report(self, top=30):
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "samples": self.sample_count,
+            "top_stacks": [{"stack": stack, "count": count} for stack, count in self.samples.most_common(top)],
+        }
+
+    def folded(self):
+        """All stacks, one "stack count" line each"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.items())
+
+
+profiler = SamplingProfiler()
+if PROFILER_AUTOSTART:
+    profiler.start()
@@ -1,11 +1,11 @@
 import pandas as pd
 import numpy as np
 import joblib
+import os
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report
-
-MODEL_PATH = "eligibility_model.pkl"
+from model_registry import MODEL_PATH, get_model
 
 # --- Step 1: Generate synthetic training data ---
 def generate_synthetic_data(n=500):
@@ -42,14 +42,16 @@ def train_model():
     print(" Training Complete. Evaluation on test set:")
     print(classification_report(y_test, clf.predict(X_test)))
 
-    # Save model
-    joblib.dump(clf, MODEL_PATH)
+    # Save model (write then rename, so a running server's registry never sees a partial file)
+    tmp_path = f"{MODEL_PATH}.tmp"
+    joblib.dump(clf, tmp_path)
+    os.replace(tmp_path, MODEL_PATH)
     print(f" Model saved to {MODEL_PATH}")
 
 
 # --- Step 3: Predict eligibility from features ---
 def ml_check_eligibility(features, model_path=MODEL_PATH):
-    clf = joblib.load(model_path)
+    clf = get_model(model_path)
     X = [[
         features.get("income", 0),
         features.get("employment_years", 0),
@@ -0,0 +1,171 @@
+# model_registry.py
+import os
+import shutil
+import threading
+import time
+
+# --- Settings (env overridable) ---
+MODEL_PATH = os.getenv("ELIGIBILITY_MODEL_PATH", "eligibility_model.pkl")
+# "1" memory-maps the compiled forest (ELIGIBILITY_BACKEND=compiled) from files
+# next to the model, so uvicorn workers share its pages instead of each holding
+# a copy; once those files exist a worker never unpickles the sklearn model for
+# scoring. (joblib's mmap_mode can't do this for sklearn trees: they copy their
+# arrays into their own buffers on unpickling.)
+MMAP_COMPILED = os.getenv("ELIGIBILITY_MODEL_MMAP", "0") not in ("", "0")
+# Seconds between checks for a new model file (0 = check on every access)
+RELOAD_INTERVAL = float(os.getenv("ELIGIBILITY_MODEL_RELOAD_INTERVAL", "5"))
+
+
+class ModelRegistry:
+    """
+    Holds one loaded copy of a model file.
+    The model is loaded on first use and swapped atomically when the file
+    on disk changes; callers holding the old model keep a consistent object.
+    """
+
+    def __init__(self, path=MODEL_PATH, mmap_compiled=MMAP_COMPILED, reload_interval=RELOAD_INTERVAL):
+        self.path = path
+        self.mmap_compiled = mmap_compiled
+        self.reload_interval = reload_interval
+        self.version = 0
+        self._lock = threading.Lock()
+        # (model, derived artifacts, file signature) replaced as one tuple
+        self._state = None
+        self._last_check = 0.0
+        # (file signature, mapped CompiledForest), independent of _state
+        self._mapped = None
+        self._last_mapped_check = 0.0
+
+    def _signature(self):
+        st = os.stat(self.path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load(self):
+        import joblib  # with sklearn, only needed once a model is actually loaded
+
+        signature = self._signature()
+        model = joblib.load(self.path)
+        self._state = (model, {}, signature)
+        self.version += 1
+        print(f" Loaded model {self.path} (version {self.version})")
+
+    def get(self):
+        state = self._state
+        if state is None:
+            with self._lock:
+                if self._state is None:
+                    self._load()
+            return self._state[0]
+
+        now = time.monotonic()
+        if now - self._last_check >= self.reload_interval:
+            self._last_check = now
+            self.reload_if_changed()
+        return self._state[0]
+
+    def reload_if_changed(self):
+        """Swap in the model file if it was replaced on disk; returns True on reload"""
+        try:
+            signature = self._signature()
+        except OSError:
+            return False  # file mid-replace or removed: keep serving the current model
+        if self._state is not None and signature == self._state[2]:
+            return False
+        with self._lock:
+            if self._state is not None and self._signature() == self._state[2]:
+                return False
+            self._load()
+        return True
+
+    def derived(self, name, builder):
+        """
+        Artifact computed once from the current model (e.g. precomputed tree tables).
+        Rebuilt automatically after a reload.
+        """
+        self.get()
+        model, artifacts, _ = self._state
+        if name not in artifacts:
+            artifacts[name] = builder(model)
+        return artifacts[name]
+
+    def compiled_forest(self):
+        """The model flattened by forest_engine (memory-mapped when mmap_compiled is set)"""
+        if self.mmap_compiled:
+            return self._mapped_forest()
+        from forest_engine import CompiledForest
+        return self.derived("compiled_forest", CompiledForest)
+
+    def _compiled_dir(self, signature):
+        # One directory per model file version; the first worker writes it, the rest map it
+        ino, mtime_ns, size = signature
+        return f"{self.path}.compiled-{ino:x}-{mtime_ns:x}-{size:x}"
+
+    def _mapped_forest(self):
+        """
+        Map the forest files of the current model file. The sklearn model is
+        only unpickled when they don't exist yet and have to be written.
+        """
+        from forest_engine import CompiledForest
+
+        mapped = self._mapped
+        now = time.monotonic()
+        if mapped is not None and now - self._last_mapped_check < self.reload_interval:
+            return mapped[1]
+        self._last_mapped_check = now
+        try:
+            signature = self._signature()
+        except OSError:
+            if mapped is None:
+                raise
+            return mapped[1]  # file mid-replace or removed: keep serving the current forest
+        if mapped is not None and signature == mapped[0]:
+            return mapped[1]
+
+        directory = self._compiled_dir(signature)
+        if not os.path.isdir(directory):
+            model = self.get()
+            signature = self._state[2]
+            directory = self._compiled_dir(signature)
+            if not os.path.isdir(directory):
+                self._write_compiled(model, directory)
+        forest = CompiledForest.load(directory)
+        self._mapped = (signature, forest)
+        return forest
+
+    def _write_compiled(self, model, directory):
+        from forest_engine import CompiledForest
+
+        tmp = f"{directory}.{os.getpid()}.tmp"
+        CompiledForest(model).save(tmp)
+        try:
+            os.rename(tmp, directory)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # another worker got there first
+        # Forests of replaced model files (open mappings stay valid after removal)
+        prefix = os.path.abspath(f"{self.path}.compiled-")
+        parent = os.path.dirname(prefix)
+        for name in os.listdir(parent):
+            stale = os.path.join(parent, name)
+            if stale.startswith(prefix) and stale != os.path.abspath(directory) \
+                    and not name.endswith(".tmp"):
+                shutil.rmtree(stale, ignore_errors=True)
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_registry(path=MODEL_PATH):
+    with _registries_lock:
+        if path not in _registries:
+            _registries[path] = ModelRegistry(path)
+        return _registries[path]
+
+def get_model(path=MODEL_PATH):
+    return get_registry(path).get()
+
+def warm_start(path=MODEL_PATH):
+    """Load the model ahead of the first request (call from app startup)"""
+    try:
+        get_model(path)
+    except Exception as e:
+        print(f" Model warm start failed: {e}")
@@ -0,0 +1,90 @@
+# ocr_pipeline.py
+import os
+import re
+import shutil
+import pytesseract
+from PIL import Image, ImageOps
+
+# --- Tesseract binary (env overridable) ---
+WINDOWS_TESSERACT = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+def configure_tesseract():
+    """TESSERACT_CMD, else tesseract on PATH, else the Windows default install"""
+    cmd = os.getenv("TESSERACT_CMD") or shutil.which("tesseract")
+    if not cmd and os.path.exists(WINDOWS_TESSERACT):
+        cmd = WINDOWS_TESSERACT
+    if cmd:
+        pytesseract.pytesseract.tesseract_cmd = cmd
+    return pytesseract.pytesseract.tesseract_cmd
+
+configure_tesseract()
+
+# --- Card layout ---
+# ID-1 card width in inches; the image is scaled so the card comes out at OCR_DPI
+CARD_WIDTH_IN = 3.37
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+
+# Value fields as fractions of the card image (x0, y0, x1, y1), labels excluded
+ID_REGIONS = {
+    "DOB": (0.24, 0.42, 0.64, 0.52),
+    "ID NO": (0.24, 0.52, 0.64, 0.62),
+}
+# Single text line, digits and separators only
+FIELD_CONFIG = "--psm 7 -c tessedit_char_whitelist=0123456789-/"
+DATE_RE = re.compile(r"\b(19\d{2}|20\d{2})-(\d{2})-(\d{2})\b")
+
+
+# --- Preprocessing ---
+def otsu_threshold(gray):
+    """Threshold that best separates dark text from the card background"""
+    hist = gray.histogram()
+    total = sum(hist)
+    sum_all = sum(i * h for i, h in enumerate(hist))
+    sum_bg = weight_bg = 0
+    best, best_var = 127, 0.0
+    for t, h in enumerate(hist):
+        weight_bg += h
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += t * h
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        var = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if var > best_var:
+            best, best_var = t, var
+    return best
+
+
+def preprocess(img, dpi=OCR_DPI):
+    """Downscale to the target DPI, grayscale, binarize"""
+    gray = ImageOps.exif_transpose(img).convert("L")
+    target_width = int(CARD_WIDTH_IN * dpi)
+    if gray.width > target_width:
+        gray = gray.resize((target_width, round(gray.height * target_width / gray.width)),
+                           Image.BILINEAR, reducing_gap=2.0)
+    cutoff = otsu_threshold(gray)
+    return gray.point(lambda p: 255 if p > cutoff else 0)
+
+
+def crop_region(img, box):
+    x0, y0, x1, y1 = box
+    return img.crop((int(x0 * img.width), int(y0 * img.height), int(x1 * img.width), int(y1 * img.height)))
+
+
+# --- OCR ---
+def ocr_emirates_id(img):
+    """
+    Read the DOB and ID number from their card regions. Falls back to OCR of
+    the whole (preprocessed) card when the DOB region doesn't yield a date.
+    """
+    card = preprocess(img)
+    fields = {
+        name: pytesseract.image_to_string(crop_region(card, box), config=FIELD_CONFIG).strip()
+        for name, box in ID_REGIONS.items()
+    }
+    if not DATE_RE.search(fields["DOB"]):
+        return pytesseract.image_to_string(card).strip()
+    return "\n".join(f"{name}: {value}" for name, value in fields.items())
@@ -0,0 +1,237 @@
+# offline_eval.py
+"""
+Offline evaluation of the eligibility pipeline; no network access needed.
+
+    python offline_eval.py dataset.jsonl [--baseline-model models/old.pkl] [--output report.json]
+    python offline_eval.py --synthetic 200000
+
+A dataset is JSON / JSONL / CSV. Each record is either a feature row
+({"income": ..., ...} or {"features": {...}}) or an applicant bundle
+({"excel_path": ..., "pdf_path": ..., "img_path": ..., "resume_path": ...}).
+Bundles are ingested in worker processes; everything is then scored in one
+batch and checked by vectorized rules over the whole result table.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from eligibility import FEATURE_ORDER, FeatureMatrix
+from model_registry import MODEL_PATH, get_model
+
+# --- Settings (env overridable) ---
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", str(os.cpu_count() or 2)))
+BUNDLE_KEYS = ("excel_path", "pdf_path", "img_path", "resume_path")
+
+# Policy the synthetic training labels encode (see ml_model.generate_synthetic_data)
+INCOME_CEILING = float(os.getenv("EVAL_INCOME_CEILING", "6000"))
+MIN_FAMILY_SIZE = int(os.getenv("EVAL_MIN_FAMILY_SIZE", "3"))
+MAX_DEBT = float(os.getenv("EVAL_MAX_DEBT", "100000"))
+
+
+# --- Dataset ---
+def load_dataset(path):
+    """List of records from a .json (list), .jsonl or .csv file"""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            return [{k: (float(v) if v not in ("", None) else None) if k in FEATURE_ORDER else v
+                     for k, v in row.items()} for row in csv.DictReader(f)]
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def synthetic_dataset(n, seed=0):
+    """Feature rows drawn like the training data"""
+    rng = np.random.default_rng(seed)
+    columns = {
+        "income": rng.integers(2000, 15000, n),
+        "employment_years": rng.integers(0, 20, n),
+        "age": rng.integers(18, 65, n),
+        "net_worth": rng.integers(-200000, 500000, n),
+        "family_size": rng.integers(1, 7, n),
+    }
+    return [dict(zip(columns, map(int, values))) for values in zip(*columns.values())]
+
+
+def _featurize_bundle(paths):
+    from ingestion import ingest_all
+    from eligibility import build_features
+
+    return build_features(ingest_all(**{k: paths.get(k) for k in BUNDLE_KEYS}))
+
+
+def featurize(records, workers=EVAL_WORKERS):
+    """Feature dicts for every record; bundles are ingested in `workers` processes"""
+    features = [None] * len(records)
+    bundles = []
+    for i, record in enumerate(records):
+        if any(record.get(k) for k in BUNDLE_KEYS):
+            bundles.append(i)
+        else:
+            features[i] = record.get("features", record)
+    if bundles:
+        if workers > 1 and len(bundles) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(bundles) // (workers * 4))
+                results = pool.map(_featurize_bundle, [records[i] for i in bundles], chunksize=chunksize)
+                for i, result in zip(bundles, results):
+                    features[i] = result
+        else:
+            for i in bundles:
+                features[i] = _featurize_bundle(records[i])
+    return features
+
+
+# --- Scoring ---
+def score(matrix, model_path=MODEL_PATH):
+    """Positive-class probability per row (NaN where the ID was invalid)"""
+    proba = np.full(len(matrix), np.nan)
+    if matrix.valid.any():
+        model = get_model(model_path)
+        positive = list(model.classes_).index(1)
+        proba[matrix.valid] = model.predict_proba(matrix.to_array())[:, positive]
+    return proba
+
+
+def result_table(matrix, proba, prefix=""):
+    """Columns (numpy arrays) the rules run over"""
+    table = {name: matrix.columns[name] for name in FEATURE_ORDER}
+    table["valid"] = matrix.valid
+    table[f"{prefix}proba"] = proba
+    # Same argmax as check_eligibility_batch for a binary model
+    table[f"{prefix}approved"] = matrix.valid & (np.nan_to_num(proba) > 0.5)
+    return table
+
+
+# --- Rule checks (vectorized, pluggable) ---
+RULES = {}
+
+def rule(name):
+    """Register func(table) -> boolean array, True where a row violates the rule"""
+    def decorator(func):
+        RULES[name] = func
+        return func
+    return decorator
+
+@rule("approved_income_above_ceiling")
+def _approved_income_above_ceiling(t):
+    return t["approved"] & (t["income"] >= INCOME_CEILING)
+
+@rule("approved_small_family")
+def _approved_small_family(t):
+    return t["approved"] & (t["family_size"] < MIN_FAMILY_SIZE)
+
+@rule("approved_heavy_debt")
+def _approved_heavy_debt(t):
+    # What eligibility_evaluator's old "loan" check meant: liabilities beyond MAX_DEBT
+    return t["approved"] & (t["net_worth"] < -MAX_DEBT)
+
+@rule("declined_meets_policy")
+def _declined_meets_policy(t):
+    return (t["valid"] & ~t["approved"] & (t["income"] < INCOME_CEILING)
+            & (t["family_size"] >= MIN_FAMILY_SIZE) & (t["net_worth"] >= -MAX_DEBT))
+
+@rule("implausible_age")
+def _implausible_age(t):
+    return t["valid"] & ((t["age"] < 18) | (t["age"] > 100))
+
+
+def check_rules(table, rules=None):
+    """{rule: violation count}"""
+    rules = RULES if rules is None else rules
+    return {name: int(np.count_nonzero(check(table))) for name, check in rules.items()}
+
+
+# --- Aggregates & drift ---
+def population_stability(expected, actual, bins=10):
+    """PSI between two probability samples over fixed [0, 1] bins"""
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    e = np.histogram(expected, edges)[0] / max(len(expected), 1)
+    a = np.histogram(actual, edges)[0] / max(len(actual), 1)
+    e, a = np.clip(e, 1e-6, None), np.clip(a, 1e-6, None)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def summarize(table):
+    valid = table["valid"]
+    n_valid = int(valid.sum())
+    return {
+        "rows": int(valid.size),
+        "valid_rows": n_valid,
+        "approval_rate": round(float(table["approved"][valid].mean()), 5) if n_valid else None,
+        "mean_confidence": round(float(np.nanmean(np.maximum(table["proba"], 1 - table["proba"]))), 5)
+        if n_valid else None,
+    }
+
+
+def drift(table, baseline_proba):
+    valid = table["valid"]
+    if not valid.any():
+        return {}
+    current, previous = table["proba"][valid], baseline_proba[valid]
+    approved, previously_approved = current > 0.5, previous > 0.5
+    return {
+        "approval_rate_delta": round(float(approved.mean() - previously_approved.mean()), 5),
+        "decision_flip_rate": round(float((approved != previously_approved).mean()), 5),
+        "newly_approved": int(np.count_nonzero(approved & ~previously_approved)),
+        "newly_declined": int(np.count_nonzero(~approved & previously_approved)),
+        "mean_abs_proba_change": round(float(np.abs(current - previous).mean()), 5),
+        "psi": round(population_stability(previous, current), 5),
+    }
+
+
+def evaluate(records, model_path=MODEL_PATH, baseline_model=None, workers=EVAL_WORKERS, rules=None):
+    """Replay records through features -> model -> rule checks; returns the report dict"""
+    timings = {}
+    start = time.perf_counter()
+    features = featurize(records, workers)
+    timings["features_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = FeatureMatrix(features)
+    table = result_table(matrix, score(matrix, model_path))
+    timings["scoring_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report = {"model": model_path, **summarize(table), "violations": check_rules(table, rules)}
+    if baseline_model:
+        report["baseline_model"] = baseline_model
+        report["drift"] = drift(table, score(matrix, baseline_model))
+    timings["checks_s"] = time.perf_counter() - start
+
+    report["timings"] = {k: round(v, 4) for k, v in timings.items()}
+    total = sum(timings.values())
+    report["rows_per_s"] = round(len(records) / total, 1) if total else None
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline eligibility evaluation (local, no network)")
+    parser.add_argument("dataset", nargs="?", help=".json / .jsonl / .csv of feature rows or bundles")
+    parser.add_argument("--synthetic", type=int, default=None, help="evaluate N synthetic feature rows instead")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--baseline-model", default=None, help="previous model to measure drift against")
+    parser.add_argument("--workers", type=int, default=EVAL_WORKERS)
+    parser.add_argument("--output", default=None, help="write the report as JSON")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        records = synthetic_dataset(args.synthetic)
+    elif args.dataset:
+        records = load_dataset(args.dataset)
+    else:
+        parser.error("give a dataset path or --synthetic N")
+
+    report = evaluate(records, args.model, args.baseline_model, args.workers)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# prompts.py
+import os
+import re
+
+# Bump when the prompt wording changes (cached reasoning is keyed on it)
+PROMPT_TEMPLATE_VERSION = 1
+DEFAULT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "300"))
+
+# Rough size estimate; close enough for gemma/llama style tokenizers on English text
+CHARS_PER_TOKEN = 4
+
+MAX_SNIPPETS_PER_DOC = 3
+MAX_SNIPPET_CHARS = 120
+
+# Lines from each document that are worth showing the model as evidence
+EVIDENCE_PATTERNS = {
+    "pdf_bank": re.compile(r"salary|balance|error", re.IGNORECASE),
+    "image_id": re.compile(r"\bDOB\b|birth|failed", re.IGNORECASE),
+    "docx_resume": re.compile(r"experience|education|\d+\s+years|error", re.IGNORECASE),
+}
+SOURCE_LABELS = {
+    "pdf_bank": "Bank statement",
+    "image_id": "Emirates ID",
+    "docx_resume": "Resume",
+}
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def applicant_summary(features):
+    age = features.get("age")
+    return "\n".join([
+        "Applicant summary:",
+        f"- Monthly income: {features.get('income', 0)} AED",
+        f"- Employment: {features.get('employment_years', 0)} years",
+        f"- Age: {age if age is not None else 'unknown (DOB not found on ID)'}",
+        f"- Net worth: {features.get('net_worth', 0)} AED",
+        f"- Family size: {features.get('family_size', 0)}",
+    ])
+
+
+def evidence_snippets(data):
+    """Short supporting lines from the raw documents, most relevant first per source"""
+    snippets = []
+    for key, pattern in EVIDENCE_PATTERNS.items():
+        text = data.get(key)
+        if not isinstance(text, str):
+            continue
+        found = 0
+        for line in text.splitlines():
+            line = line.strip()
+            if line and pattern.search(line):
+                snippets.append(f"- {SOURCE_LABELS[key]}: {line[:MAX_SNIPPET_CHARS]}")
+                found += 1
+                if found == MAX_SNIPPETS_PER_DOC:
+                    break
+    excel = data.get("excel_assets")
+    if isinstance(excel, dict) and "error" in excel:
+        snippets.append(f"- Assets sheet: read error: {str(excel['error'])[:MAX_SNIPPET_CHARS]}")
+    return snippets
+
+
+def build_reasoning_prompt(features, decision=None, data=None, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Compact LLM prompt from the extracted features plus a few evidence lines,
+    kept within `token_budget` (estimated) tokens.
+    Returns (prompt, stats) where stats compares against the old raw-data prompt.
+    """
+    if decision is not None:
+        question = f"System decision: {str(decision).strip()}. Explain briefly why."
+    else:
+        question = "What factors should I check for eligibility?"
+
+    parts = [applicant_summary(features)]
+    used = estimate_tokens(parts[0]) + estimate_tokens(question) + 2
+
+    if data:
+        evidence = []
+        for snippet in evidence_snippets(data):
+            cost = estimate_tokens(snippet) + 1
+            if used + cost > token_budget:
+                break
+            evidence.append(snippet)
+            used += cost
+        if evidence:
+            parts.append("Evidence:\n" + "\n".join(evidence))
+
+    parts.append(question)
+    prompt = "\n\n".join(parts)
+
+    stats = {
+        "raw_tokens": estimate_tokens(f"User data: {data}. {question}") if data is not None else None,
+        "prompt_tokens": estimate_tokens(prompt),
+        "token_budget": token_budget,
+    }
+    return prompt, stats
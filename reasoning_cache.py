@@ -0,0 +1,182 @@
+# reasoning_cache.py
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from prompts import PROMPT_TEMPLATE_VERSION
+
+# --- Settings (env overridable) ---
+CACHE_TTL = float(os.getenv("REASONING_CACHE_TTL", str(24 * 3600)))
+CACHE_ENTRIES = int(os.getenv("REASONING_CACHE_ENTRIES", "1024"))
+# Path to a SQLite file to keep explanations across restarts; empty = memory only
+CACHE_DB = os.getenv("REASONING_CACHE_DB", "")
+# Row cap for the SQLite file; the rows closest to expiry (the oldest writes) go first
+CACHE_DB_ENTRIES = int(os.getenv("REASONING_CACHE_DB_ENTRIES", "20000"))
+
+# Bucket widths: applicants inside the same buckets get the same explanation
+INCOME_BUCKET = 500
+NET_WORTH_BUCKET = 10000
+AGE_BUCKET = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reasoning (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    template_version INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reasoning_expires_at ON reasoning (expires_at);
+"""
+
+
+def _bucket(value, width):
+    return int((value or 0) // width)
+
+
+def decision_label(decision):
+    """Decision string -> (label, confidence rounded to 0.1)"""
+    text = str(decision).lower()
+    if "approved" in text:
+        label = "approved"
+    elif "declined" in text or "soft" in text:
+        label = "declined"
+    else:
+        label = "invalid"
+    confidence = None
+    if "confidence:" in text:
+        try:
+            confidence = round(float(text.split("confidence:")[1].strip(" )")), 1)
+        except ValueError:
+            pass
+    return label, confidence
+
+
+def make_key(features, decision, model="gemma:2b", template_version=PROMPT_TEMPLATE_VERSION):
+    label, confidence = decision_label(decision)
+    age = features.get("age")
+    return "|".join([
+        model,
+        f"t{template_version}",
+        label,
+        str(confidence),
+        f"inc={_bucket(features.get('income'), INCOME_BUCKET)}",
+        f"emp={int(features.get('employment_years') or 0)}",
+        f"age={'none' if age is None else _bucket(age, AGE_BUCKET)}",
+        f"nw={_bucket(features.get('net_worth'), NET_WORTH_BUCKET)}",
+        f"fam={int(features.get('family_size') or 0)}",
+    ])
+
+
+class ReasoningCache:
+    """LRU + TTL cache of LLM explanations, optionally backed by SQLite"""
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, db_path=CACHE_DB,
+                 max_db_entries=CACHE_DB_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.db_path = db_path or None
+        self.max_db_entries = max_db_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {"hits": 0, "misses": 0}
+        if self.db_path:
+            self._conn().executescript(SCHEMA)
+            self._prune_db()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+        if self.db_path:
+            row = self._conn().execute(
+                "SELECT value, expires_at FROM reasoning WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None:
+                with self._lock:
+                    self._remember(key, row[0], row[1])
+                    self.stats["hits"] += 1
+                return row[0]
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+        if self.db_path:
+            model, template = key.split("|", 2)[:2]
+            self._conn().execute(
+                "INSERT OR REPLACE INTO reasoning (key, model, template_version, value, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model, int(template[1:]), value, expires_at),
+            )
+            self._prune_db()
+
+    def _prune_db(self):
+        """Delete expired rows and everything past max_db_entries"""
+        self._conn().execute(
+            "DELETE FROM reasoning WHERE expires_at <= ? OR key IN "
+            "(SELECT key FROM reasoning ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (time.time(), self.max_db_entries),
+        )
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def invalidate(self, model=None, template_version=None):
+        """
+        Drop cached explanations for one LLM model and/or prompt template
+        version; with no arguments, drop everything. Returns entries removed from memory.
+        """
+        def matches(key):
+            key_model, key_template = key.split("|", 2)[:2]
+            return ((model is None or key_model == model) and
+                    (template_version is None or key_template == f"t{template_version}"))
+
+        with self._lock:
+            stale = [k for k in self._memory if matches(k)]
+            for k in stale:
+                del self._memory[k]
+
+        if self.db_path:
+            clauses, params = [], []
+            if model is not None:
+                clauses.append("model = ?")
+                params.append(model)
+            if template_version is not None:
+                clauses.append("template_version = ?")
+                params.append(template_version)
+            where = " WHERE " + " AND ".join(clauses) if clauses else ""
+            self._conn().execute(f"DELETE FROM reasoning{where}", params)
+        return len(stale)
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def report(self):
+        return {**self.stats, "hit_rate": round(self.hit_rate(), 3), "memory_entries": len(self._memory)}
+
+
+cache = ReasoningCache()
@@ -1,14 +1,62 @@
-from ingestion import ingest_all
-from eligibility import build_features, check_eligibility
+import argparse
+import json
+from ingestion import ingest_all, ingest_lazy
+from eligibility import build_features, check_eligibility, check_eligibility_batch
 from recommendations import generate_recommendations   # 👈 new import
 
-data = ingest_all()
-features = build_features(data)
-decision = check_eligibility(features)
-recs = generate_recommendations(features, decision)     # 👈 new call
 
-print("Extracted Features:", features)
-print("Final Decision:", decision)
-print("\nRecommendations:")
-for r in recs:
-    print("-", r)
+def run_single():
+    data = ingest_all()
+    features = build_features(data)
+    decision = check_eligibility(features)
+    recs = generate_recommendations(features, decision)     # 👈 new call
+
+    print("Extracted Features:", features)
+    print("Final Decision:", decision)
+    print("\nRecommendations:")
+    for r in recs:
+        print("-", r)
+
+
+def run_batch(manifest_path, explain=False):
+    """
+    Manifest is a JSON list of applications, e.g.
+    [{"id": "A1", "excel_path": "...", "pdf_path": "...", "img_path": "...", "resume_path": "..."}]
+    With explain=True each line also carries the applicant's explanation.
+    """
+    with open(manifest_path, encoding="utf-8") as f:
+        applications = json.load(f)
+
+    # Documents are read on demand, so an unreadable ID skips the other three
+    features_list = [
+        build_features(ingest_lazy(
+            excel_path=app.get("excel_path"),
+            pdf_path=app.get("pdf_path"),
+            img_path=app.get("img_path"),
+            resume_path=app.get("resume_path"),
+        ), short_circuit=True)
+        for app in applications
+    ]
+    decisions, proba = check_eligibility_batch(features_list, return_proba=True)
+    explanations = [None] * len(features_list)
+    if explain:
+        from explainability_monitoring import explain_decisions  # scipy, only when asked for
+        explanations = explain_decisions(features_list, proba)
+
+    for i, (app, features, decision, report) in enumerate(zip(applications, features_list, decisions, explanations)):
+        line = {"id": app.get("id", i), "features": features, "decision": decision.strip()}
+        if report is not None:
+            line["explanation"] = report
+        print(json.dumps(line))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run eligibility checks from the command line")
+    parser.add_argument("--batch", metavar="MANIFEST", help="JSON manifest of applications to score in one batch")
+    parser.add_argument("--explain", action="store_true", help="with --batch, add per-applicant explanations")
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(args.batch, explain=args.explain)
+    else:
+        run_single()
@@ -1,13 +1,111 @@
-from fastapi import FastAPI, UploadFile, Form
+from fastapi import FastAPI, UploadFile, Form, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import json
+import multiprocessing
+import os
+import time
 import uvicorn
 from ingestion import ingest_all
-from eligibility import build_features, check_eligibility
+from ingestion_cache import cache as ingestion_cache
+from eligibility import build_features, check_eligibility, check_eligibility_batch, warm_model
 from recommendations import generate_recommendations
-from agents_orchestration import ollama_reasoning, check_ollama_server
+from agents_orchestration import ollama_reasoning_async, ollama_reasoning_stream_async, reasoning_job
+from jobs import JobQueue
+from prompts import build_reasoning_prompt
+import reasoning_cache
+from metrics import observe_stage, profiler, render_metrics, track_stage, watch_cache
 
 app = FastAPI(title="Social Support AI API")
 
+# --- Worker pool & per-stage limits ---
+CPU_WORKERS = int(os.getenv("EVAL_CPU_WORKERS", str(os.cpu_count() or 2)))
+MAX_CONCURRENT_ML = int(os.getenv("EVAL_MAX_CONCURRENT_ML", str(CPU_WORKERS * 2)))
+MAX_CONCURRENT_LLM = int(os.getenv("EVAL_MAX_CONCURRENT_LLM", "2"))
+# Pool workers start as fresh interpreters: a fork of this threaded server would
+# inherit the reader pool without its threads and any lock held at fork time
+POOL_START_METHOD = os.getenv(
+    "EVAL_START_METHOD", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+# "1" registers the /debug/profiler routes. They are unauthenticated (anyone
+# reaching the API could start sampling and read code paths), so keep them off
+# outside a debugging session.
+PROFILER_ENDPOINTS = os.getenv("PROFILER_ENDPOINTS", "0") == "1"
+
+# Separate limits, so applicants queued for the LLM never hold up ML scoring
+ml_slots = asyncio.Semaphore(MAX_CONCURRENT_ML)
+llm_slots = asyncio.Semaphore(MAX_CONCURRENT_LLM)
+cpu_pool = None
+# LLM reasoning runs here, off the request path; JOB_WORKERS bounds its concurrency.
+# Created at startup, so importing this module (e.g. in a pool worker) opens no database
+job_queue = None
+
+watch_cache("ingestion", ingestion_cache)
+watch_cache("reasoning", reasoning_cache.cache)
+
+def featurize_application(sources):
+    """
+    Ingest and features for one applicant, run in a worker process.
+    `sources` are ingest_all arguments: paths, or document bytes for uploads.
+    Stage timings and ingestion cache hit/miss counts come back with the
+    result, since the worker's own metrics are never scraped.
+    """
+    timings = {}
+    cache_before = dict(ingestion_cache.stats)
+    start = time.perf_counter()
+    data = ingest_all(**sources, parallel=True, timings=timings)
+    ingested = time.perf_counter()
+    features = build_features(data)
+    timings.update(ingest=ingested - start, features=time.perf_counter() - ingested)
+    cache_counts = {k: v - cache_before.get(k, 0) for k, v in ingestion_cache.stats.items()}
+    return data, features, timings, cache_counts
+
+def application_features(sources):
+    """featurize_application without the documents, which the batch path never returns"""
+    _, features, timings, cache_counts = featurize_application(sources)
+    return features, timings, cache_counts
+
+def score_application(sources):
+    """Ingest, features, eligibility: the CPU-bound stages, run in a worker process"""
+    data, features, timings, cache_counts = featurize_application(sources)
+    start = time.perf_counter()
+    decision = check_eligibility(features)
+    timings["eligibility"] = time.perf_counter() - start
+    return data, features, decision, timings, cache_counts
+
+async def run_in_pool(func, sources):
+    """func(sources) in the process pool; its timings and cache counts are recorded here"""
+    async with ml_slots:
+        loop = asyncio.get_running_loop()
+        *result, timings, cache_counts = await loop.run_in_executor(cpu_pool, func, sources)
+    for stage, seconds in timings.items():
+        observe_stage(stage, seconds)
+    ingestion_cache.add_stats(cache_counts)
+    return result
+
+async def run_scoring(sources):
+    """score_application in the process pool: (data, features, decision)"""
+    return await run_in_pool(score_application, sources)
+
+@app.on_event("startup")
+def load_model():
+    global cpu_pool, job_queue
+    warm_model()
+    cpu_pool = ProcessPoolExecutor(max_workers=CPU_WORKERS, initializer=warm_model,
+                                   mp_context=multiprocessing.get_context(POOL_START_METHOD))
+    job_queue = JobQueue()
+    job_queue.register("reasoning", reasoning_job)
+    job_queue.start()
+
+@app.on_event("shutdown")
+def stop_workers():
+    if job_queue is not None:
+        job_queue.stop()
+    if cpu_pool is not None:
+        cpu_pool.shutdown(wait=False, cancel_futures=True)
+
 # Request schema
 class EvalRequest(BaseModel):
     excel_path: str
@@ -16,38 +114,196 @@ class EvalRequest(BaseModel):
     resume_path: str
 
 @app.post("/evaluate")
-def evaluate(req: EvalRequest):
-    # Step 1: Ingest
-    data = ingest_all(
-        excel_path=req.excel_path,
-        pdf_path=req.pdf_path,
-        img_path=req.img_path,
-        resume_path=req.resume_path,
-    )
-
-    # Step 2: Features
-    features = build_features(data)
+async def evaluate(req: EvalRequest, wait_reasoning: bool = False, priority: int = 0):
+    """
+    Returns the ML decision as soon as it is ready. LLM reasoning is queued as a
+    background job (poll /jobs/{job_id}) unless wait_reasoning=true.
+    """
+    paths = {
+        "excel_path": req.excel_path,
+        "pdf_path": req.pdf_path,
+        "img_path": req.img_path,
+        "resume_path": req.resume_path,
+    }
+    return await evaluate_sources(paths, wait_reasoning, priority)
 
-    # Step 3: Eligibility
-    decision = check_eligibility(features)
+@app.post("/evaluate/upload")
+async def evaluate_upload(
+    excel: UploadFile,
+    pdf: UploadFile,
+    image: UploadFile,
+    resume: UploadFile,
+    wait_reasoning: bool = False,
+    priority: int = 0,
+):
+    """
+    Same as /evaluate, but the four documents arrive as a multipart upload and
+    go straight into the pipeline as bytes; nothing is written to disk.
+    """
+    documents = {
+        "excel_path": await excel.read(),
+        "pdf_path": await pdf.read(),
+        "img_path": await image.read(),
+        "resume_path": await resume.read(),
+    }
+    return await evaluate_sources(documents, wait_reasoning, priority)
 
-    # Step 4: Reasoning
-    if not check_ollama_server():
-        reasoning = "[LLM Error] Ollama not running"
-    else:
-        prompt = f"User data: {data}. System decision: {decision}. Explain briefly why."
-        reasoning = ollama_reasoning(prompt, model="gemma:2b")
+async def evaluate_sources(sources, wait_reasoning=False, priority=0):
+    """The /evaluate pipeline for ingest_all arguments (paths or document bytes)"""
+    # Steps 1-3: Ingest, Features, Eligibility (off the event loop)
+    data, features, decision = await run_scoring(sources)
+
+    # Step 4: Reasoning (cached per feature bucket, else LLM)
+    with track_stage("prompt"):
+        prompt, prompt_stats = build_reasoning_prompt(features, decision, data)
+    cache_key = reasoning_cache.make_key(features, decision, model="gemma:2b")
+    reasoning = reasoning_cache.cache.get(cache_key)
+    job_id = None
+    if reasoning is None and wait_reasoning:
+        async with llm_slots:
+            reasoning = await ollama_reasoning_async(prompt, model="gemma:2b")
+        if not reasoning.startswith("[LLM Error]"):
+            reasoning_cache.cache.put(cache_key, reasoning)
+    elif reasoning is None:
+        job_id = job_queue.submit(
+            "reasoning",
+            {"prompt": prompt, "model": "gemma:2b", "cache_key": cache_key},
+            priority=priority,
+        )
 
     # Step 5: Recommendations
-    recs = generate_recommendations(features, decision)
+    with track_stage("recommendations"):
+        recs = generate_recommendations(features, decision)
 
     return {
         "data": data,
         "features": features,
         "decision": decision,
         "reasoning": reasoning,
+        "reasoning_job_id": job_id,
+        "prompt_tokens": prompt_stats,
         "recommendations": recs,
     }
 
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.post("/evaluate/stream")
+async def evaluate_stream(req: EvalRequest):
+    """
+    Server-sent events: one `decision` event as soon as the ML result is ready,
+    then `token` events as the LLM writes its reasoning, then `done`.
+    """
+    paths = {
+        "excel_path": req.excel_path,
+        "pdf_path": req.pdf_path,
+        "img_path": req.img_path,
+        "resume_path": req.resume_path,
+    }
+    data, features, decision = await run_scoring(paths)
+    recs = generate_recommendations(features, decision)
+
+    async def events():
+        yield _sse("decision", {"features": features, "decision": decision, "recommendations": recs})
+
+        cache_key = reasoning_cache.make_key(features, decision, model="gemma:2b")
+        reasoning = reasoning_cache.cache.get(cache_key)
+        if reasoning is not None:
+            yield _sse("token", {"text": reasoning})
+        else:
+            prompt, _ = build_reasoning_prompt(features, decision, data)
+            chunks = []
+            async with llm_slots:
+                async for chunk in ollama_reasoning_stream_async(prompt, model="gemma:2b"):
+                    chunks.append(chunk)
+                    yield _sse("token", {"text": chunk})
+            reasoning = "".join(chunks)
+            if "[LLM Error]" not in reasoning:
+                reasoning_cache.cache.put(cache_key, reasoning)
+        yield _sse("done", {"reasoning": reasoning})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+class EvalBatchRequest(BaseModel):
+    applications: List[EvalRequest]
+
+@app.post("/evaluate/batch")
+async def evaluate_batch(req: EvalBatchRequest, explain: bool = False):
+    """
+    Score many applicants with one model call (no LLM reasoning).
+    Ingestion and features run per applicant in the process pool, under the
+    same ml_slots limit as /evaluate. explain=true adds per-applicant
+    explanations, reusing the scoring probabilities.
+    """
+    async def featurize(a):
+        paths = {
+            "excel_path": a.excel_path,
+            "pdf_path": a.pdf_path,
+            "img_path": a.img_path,
+            "resume_path": a.resume_path,
+        }
+        (features,) = await run_in_pool(application_features, paths)
+        return features
+
+    features_list = await asyncio.gather(*(featurize(a) for a in req.applications))
+    with track_stage("eligibility_batch"):
+        decisions, proba = await asyncio.to_thread(check_eligibility_batch, features_list, True)
+    results = [
+        {
+            "features": features,
+            "decision": decision,
+            "recommendations": generate_recommendations(features, decision),
+        }
+        for features, decision in zip(features_list, decisions)
+    ]
+    if explain:
+        from explainability_monitoring import explain_decisions  # scipy, only when asked for
+        with track_stage("explain"):
+            reports = await asyncio.to_thread(explain_decisions, features_list, proba)
+        for result, report in zip(results, reports):
+            result["explanation"] = report
+
+    return {"results": results}
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Ingestion lookup counts include the pool workers'; memory_entries is this process's tier"""
+    return {"ingestion": ingestion_cache.report(), "reasoning": reasoning_cache.cache.report()}
+
+@app.post("/cache/reasoning/invalidate")
+def invalidate_reasoning(model: Optional[str] = None, template_version: Optional[int] = None):
+    """Call after switching LLM model or changing the prompt template"""
+    removed = reasoning_cache.cache.invalidate(model=model, template_version=template_version)
+    return {"removed": removed}
+
+@app.get("/metrics")
+def prometheus_metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+# --- Sampling profiler (routes only with PROFILER_ENDPOINTS=1; off unless started) ---
+if PROFILER_ENDPOINTS:
+    @app.get("/debug/profiler")
+    def profiler_report(top: int = 30):
+        return profiler.report(top)
+
+    @app.post("/debug/profiler/start")
+    def profiler_start(interval: Optional[float] = None, reset: bool = True):
+        if reset and not profiler.running:
+            profiler.reset()
+        return {"started": profiler.start(interval)}
+
+    @app.post("/debug/profiler/stop")
+    def profiler_stop(top: int = 30):
+        profiler.stop()
+        return profiler.report(top)
+
 if __name__ == "__main__":
     uvicorn.run("server:app", host="0.0.0.0", port=8000, reload=True)
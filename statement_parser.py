@@ -0,0 +1,130 @@
+# statement_parser.py
+import io
+import re
+
+# --- Precompiled patterns ---
+# "2025-01-10   Salary Credit    +5000" / "10/01/2025 Grocery Store -350.50 AED"
+TRANSACTION_RE = re.compile(
+    r"^\s*(?P<date>\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4})\s+"
+    r"(?P<description>.+?)\s+"
+    r"(?P<amount>[+-]?\d[\d,]*(?:\.\d+)?)\s*(?:AED)?\s*$"
+)
+SALARY_MARKER = "Salary"
+# Amount rule used by build_features: last signed number of 3+ digits on the salary line
+SALARY_AMOUNT_RE = re.compile(r"[+-]?\d{3,}")
+
+
+# --- Line sources (lazy) ---
+def iter_text_lines(text):
+    """Lines of an already-extracted statement, without building a list"""
+    for line in io.StringIO(text):
+        yield line.rstrip("\n")
+
+
+def iter_pdf_pages(source, max_pages=None):
+    """
+    Text of each page of a PDF, extracted only when the iteration reaches it.
+    `source` is a path or the PDF bytes; stop iterating to skip the remaining pages.
+    """
+    import fitz  # PyMuPDF
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        doc = fitz.open(stream=source, filetype="pdf")
+    else:
+        doc = fitz.open(source)
+    with doc:
+        for page_no, page in enumerate(doc):
+            if max_pages is not None and page_no >= max_pages:
+                break
+            yield page.get_text()
+
+
+def iter_pdf_lines(source, max_pages=None):
+    """Lines of a PDF statement, one page at a time (see iter_pdf_pages)"""
+    for text in iter_pdf_pages(source, max_pages=max_pages):
+        yield from iter_text_lines(text)
+
+
+# --- Parsing ---
+def parse_transaction(line):
+    """Transaction dict for a statement line, or None if it isn't one"""
+    m = TRANSACTION_RE.match(line)
+    if m is None:
+        return None
+    return {
+        "date": m.group("date"),
+        "description": m.group("description").strip(),
+        "amount": float(m.group("amount").replace(",", "")),
+    }
+
+
+def parse_transactions(lines):
+    for line in lines:
+        tx = parse_transaction(line)
+        if tx is not None:
+            yield tx
+
+
+def salary_credits(lines, limit=None):
+    """Positive transactions whose description mentions salary; stops after `limit`"""
+    found = []
+    for tx in parse_transactions(lines):
+        if tx["amount"] > 0 and SALARY_MARKER.lower() in tx["description"].lower():
+            found.append(tx)
+            if limit is not None and len(found) >= limit:
+                break
+    return found
+
+
+def salary_line_amount(line):
+    """The income rule: last signed 3+ digit number on a salary line (None if it has none)"""
+    matches = SALARY_AMOUNT_RE.findall(line)
+    return int(matches[-1].replace("+", "")) if matches else None
+
+
+def first_salary_amount(lines):
+    """
+    Amount on the first line mentioning "Salary" (None if there is no such line
+    or it carries no amount). Stops reading at that line.
+    """
+    for line in lines:
+        if SALARY_MARKER in line:
+            return salary_line_amount(line)
+    return None
+
+
+def statement_text(source, stop_at_salary=False, max_pages=None):
+    """
+    Statement text, extracted page by page. With stop_at_salary the text ends
+    with the page holding the first "Salary" line, so the later pages of a long
+    statement are never extracted; first_salary_amount over it is unchanged.
+    """
+    pages = []
+    for text in iter_pdf_pages(source, max_pages=max_pages):
+        pages.append(text)
+        if stop_at_salary and SALARY_MARKER in text:
+            break
+    return "".join(pages).strip()
+
+
+def read_statement(source, max_pages=None):
+    """
+    Structured view of a PDF bank statement (every page). Not used by
+    ingestion, which keeps pdf_bank as text.
+    """
+    monthly_income = None
+    transactions = []
+    for line in iter_pdf_lines(source, max_pages=max_pages):
+        if monthly_income is None and SALARY_MARKER in line:
+            monthly_income = salary_line_amount(line)
+        tx = parse_transaction(line)
+        if tx is not None:
+            transactions.append(tx)
+    salaries = [tx for tx in transactions
+                if tx["amount"] > 0 and SALARY_MARKER.lower() in tx["description"].lower()]
+    return {
+        "transactions": transactions,
+        "salary_credits": salaries,
+        # Same rule as build_features' income
+        "monthly_income": monthly_income or 0,
+    }
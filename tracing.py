@@ -0,0 +1,225 @@
+# tracing.py
+import atexit
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+# --- Settings (env overridable) ---
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "10000"))
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", "100"))
+TRACE_FLUSH_INTERVAL = float(os.getenv("TRACE_FLUSH_INTERVAL", "2"))
+TRACE_FALLBACK_PATH = os.getenv("TRACE_FALLBACK_PATH", os.path.join("logs", "traces.jsonl"))
+TRACE_PROJECT = os.getenv("LANGSMITH_PROJECT", "social-support-ai")
+# Long strings (raw OCR / statement text) are cut to this many characters
+MAX_FIELD_CHARS = 2000
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _dotted_part(start_time, run_id):
+    return f"{start_time.strftime('%Y%m%dT%H%M%S%fZ')}{run_id}"
+
+
+def _compact(value):
+    if isinstance(value, str):
+        return value if len(value) <= MAX_FIELD_CHARS else value[:MAX_FIELD_CHARS] + "...[truncated]"
+    if isinstance(value, dict):
+        return {k: _compact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_compact(v) for v in value]
+    return value
+
+
+# --- Sinks ---
+class FileSink:
+    """Appends runs as JSON lines; used offline and when LangSmith is unreachable"""
+
+    def __init__(self, path=TRACE_FALLBACK_PATH):
+        self.path = path
+
+    def write(self, runs):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for run in runs:
+                f.write(json.dumps(run, default=str) + "\n")
+
+
+class LangSmithSink:
+    """Sends a whole batch of runs in one request"""
+
+    def __init__(self, api_key):
+        from langsmith import Client
+        self.client = Client(api_key=api_key)
+
+    def write(self, runs):
+        self.client.batch_ingest_runs(create=runs)
+
+
+# --- Exporter ---
+class TraceExporter:
+    """
+    Background exporter: callers enqueue runs (non-blocking) and a worker
+    thread ships them in batches of `batch_size` or every `flush_interval`
+    seconds. Runs are dropped (and counted) when the queue is full; batches the
+    primary sink rejects go to the fallback sink.
+    """
+
+    def __init__(self, sink, fallback=None, queue_size=TRACE_QUEUE_SIZE,
+                 batch_size=TRACE_BATCH_SIZE, flush_interval=TRACE_FLUSH_INTERVAL):
+        self.sink = sink
+        self.fallback = fallback
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._flush_requested = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self.stats = {"enqueued": 0, "dropped": 0, "exported": 0, "fallback": 0, "failed": 0}
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, runs):
+        for run in runs:
+            try:
+                self._queue.put_nowait(run)
+                self.stats["enqueued"] += 1
+            except queue.Full:
+                self.stats["dropped"] += 1
+
+    def flush(self, timeout=5):
+        """Ship everything queued so far (blocks up to `timeout` seconds)"""
+        self._idle.clear()
+        self._flush_requested.set()
+        self._idle.wait(timeout)
+
+    def _run(self):
+        while True:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._flush_requested.is_set():
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+                except queue.Empty:
+                    continue
+            # Drain what's left when a flush was asked for
+            if self._flush_requested.is_set():
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            if batch:
+                self._export(batch)
+            if self._flush_requested.is_set() and self._queue.empty():
+                self._flush_requested.clear()
+                self._idle.set()
+
+    def _export(self, batch):
+        # Trimming happens here, on the worker thread, not in the caller
+        for run in batch:
+            for field in ("inputs", "outputs"):
+                if field in run:
+                    run[field] = _compact(run[field])
+        try:
+            self.sink.write(batch)
+            self.stats["exported"] += len(batch)
+            return
+        except Exception as e:
+            print(f" Trace export failed ({e}), writing to fallback sink")
+        if self.fallback is None:
+            self.stats["failed"] += len(batch)
+            return
+        try:
+            self.fallback.write(batch)
+            self.stats["fallback"] += len(batch)
+        except Exception as e:
+            print(f" Trace fallback sink failed: {e}")
+            self.stats["failed"] += len(batch)
+
+
+# --- Traces ---
+class Trace:
+    """
+    One pipeline run: a parent run plus one child span per step.
+    Spans are collected in memory and handed to the exporter together on end().
+    """
+
+    def __init__(self, exporter, name, inputs=None, metadata=None, project=TRACE_PROJECT):
+        self.exporter = exporter
+        self.id = str(uuid.uuid4())
+        self.start_time = _now()
+        self.dotted_order = _dotted_part(self.start_time, self.id)
+        self.project = project
+        self.run = {
+            "id": self.id,
+            "trace_id": self.id,
+            "dotted_order": self.dotted_order,
+            "name": name,
+            "run_type": "chain",
+            "inputs": inputs or {},
+            "start_time": self.start_time,
+            "extra": {"metadata": metadata or {}},
+            "session_name": project,
+        }
+        self.spans = []
+        self._last_end = self.start_time
+
+    def span(self, name, outputs, inputs=None, run_type="chain"):
+        """Record a finished step (its start is taken as the end of the previous step)"""
+        span_id = str(uuid.uuid4())
+        end_time = _now()
+        start_time = self._last_end
+        self._last_end = end_time
+        self.spans.append({
+            "id": span_id,
+            "trace_id": self.id,
+            "parent_run_id": self.id,
+            "dotted_order": f"{self.dotted_order}.{_dotted_part(start_time, span_id)}",
+            "name": name,
+            "run_type": run_type,
+            "inputs": inputs or {},
+            "outputs": {"output": outputs},
+            "start_time": start_time,
+            "end_time": end_time,
+            "session_name": self.project,
+        })
+
+    def end(self, outputs=None, error=None):
+        self.run["end_time"] = _now()
+        self.run["outputs"] = outputs or {}
+        if error:
+            self.run["error"] = str(error)
+        self.exporter.submit([self.run] + self.spans)
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+def get_exporter():
+    """Process-wide exporter: LangSmith when LANGSMITH_API_KEY is set, else the local file"""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            fallback = FileSink()
+            sink = fallback
+            api_key = os.getenv("LANGSMITH_API_KEY")
+            if api_key:
+                try:
+                    sink = LangSmithSink(api_key)
+                except Exception as e:
+                    print(f" LangSmith unavailable ({e}), tracing to {fallback.path}")
+            _exporter = TraceExporter(sink, fallback=fallback if sink is not fallback else None)
+        return _exporter
+
+def start_trace(name, inputs=None, metadata=None):
+    return Trace(get_exporter(), name, inputs=inputs, metadata=metadata)
@@ -0,0 +1,337 @@
+# training.py
+"""
+Eligibility model training at scale.
+
+    python training.py --rows 2000000 --chunk-size 200000 --promote
+    python training.py --source decisions --promote
+
+Rows are streamed in chunks (synthetic, or replayed from the decision log) and
+each chunk adds trees to the forest (warm_start), so memory is bounded by the
+chunk size, and every fit uses all cores. A compression stage then tries
+smaller forests (fewer, shallower trees), measures accuracy and single-row p99
+latency, and keeps the fastest one within the accuracy bar. The result is
+saved as a versioned artifact with a JSON metadata file beside it.
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from model_registry import MODEL_PATH
+from eligibility import FEATURE_ORDER
+from forest_engine import CompiledForest
+
+# --- Settings (env overridable) ---
+MODEL_DIR = os.getenv("ELIGIBILITY_MODEL_DIR", "models")
+N_JOBS = int(os.getenv("TRAIN_N_JOBS", "-1"))
+CHUNK_SIZE = int(os.getenv("TRAIN_CHUNK_SIZE", "100000"))
+# Held-out rows kept in memory for evaluation (taken from every chunk)
+HOLDOUT_FRACTION = 0.1
+MAX_HOLDOUT_ROWS = 50000
+# Rows kept (reservoir sample) to refit the shallower candidates on
+MAX_COMPRESSION_ROWS = 200000
+
+
+# --- Data sources (chunks of X, y) ---
+def synthetic_chunks(total_rows, chunk_size=CHUNK_SIZE, seed=42):
+    """Same distribution and label rule as ml_model.generate_synthetic_data"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, total_rows, chunk_size):
+        n = min(chunk_size, total_rows - start)
+        X = np.column_stack([
+            rng.integers(2000, 15000, n),
+            rng.integers(0, 20, n),
+            rng.integers(18, 65, n),
+            rng.integers(0, 500000, n),
+            rng.integers(1, 7, n),
+        ]).astype(np.float64)
+        # Approve if low income but big family, else decline
+        y = ((X[:, 0] < 6000) & (X[:, 4] >= 3)).astype(int)
+        yield X, y
+
+
+def decision_log_chunks(chunk_size=CHUNK_SIZE, log=None, **query):
+    """
+    Past decisions replayed as training rows (approved = 1, declined = 0;
+    invalid-ID entries are skipped). `query` is passed to DecisionLog.query.
+    """
+    if log is None:
+        from decision_log import decision_log as log
+
+    rows, labels = [], []
+    for entry in log.query(**query):
+        decision = str(entry.get("decision", "")).lower()
+        if "approved" in decision:
+            label = 1
+        elif "declined" in decision:
+            label = 0
+        else:
+            continue
+        features = entry.get("features") or {}
+        rows.append([features.get(name) or 0 for name in FEATURE_ORDER])
+        labels.append(label)
+        if len(rows) == chunk_size:
+            yield np.asarray(rows, dtype=np.float64), np.asarray(labels)
+            rows, labels = [], []
+    if rows:
+        yield np.asarray(rows, dtype=np.float64), np.asarray(labels)
+
+
+# --- Streaming fit ---
+class _Reservoir:
+    """Uniform sample of at most `capacity` rows from a stream of chunks"""
+
+    def __init__(self, capacity, n_features, rng):
+        self.X = np.empty((capacity, n_features))
+        self.y = np.empty(capacity, dtype=int)
+        self.capacity = capacity
+        self.seen = 0
+        self.rng = rng
+
+    def add(self, X, y):
+        n = len(X)
+        seen = self.seen + np.arange(n)  # stream position of each row
+        slots = np.where(seen < self.capacity, seen,
+                         np.floor(self.rng.random(n) * (seen + 1)).astype(np.int64))
+        keep = slots < self.capacity
+        # Duplicate slots: the later row wins, as in the one-at-a-time algorithm
+        self.X[slots[keep]] = X[keep]
+        self.y[slots[keep]] = y[keep]
+        self.seen += n
+
+    def sample(self):
+        n = min(self.seen, self.capacity)
+        return self.X[:n], self.y[:n]
+
+
+def train_streaming(chunks, trees_per_chunk=10, max_trees=100, max_depth=None,
+                    n_jobs=N_JOBS, seed=42, compression_rows=MAX_COMPRESSION_ROWS):
+    """
+    Fit a forest chunk by chunk: each chunk grows `trees_per_chunk` new trees
+    (bagging over the stream) until `max_trees`. Returns
+    (model, (X_holdout, y_holdout), (X_sample, y_sample), stats).
+    """
+    rng = np.random.default_rng(seed)
+    clf = RandomForestClassifier(n_estimators=0, max_depth=max_depth, n_jobs=n_jobs,
+                                 random_state=seed, warm_start=True)
+    holdout_X, holdout_y = [], []
+    holdout_rows = 0
+    reservoir = _Reservoir(compression_rows, len(FEATURE_ORDER), rng)
+    stats = {"rows_seen": 0, "rows_trained": 0, "chunks": 0, "fit_s": 0.0}
+    pending = None
+
+    for X, y in chunks:
+        stats["rows_seen"] += len(X)
+        stats["chunks"] += 1
+        test = rng.random(len(X)) < HOLDOUT_FRACTION
+        if holdout_rows < MAX_HOLDOUT_ROWS:
+            take = np.flatnonzero(test)[:MAX_HOLDOUT_ROWS - holdout_rows]
+            holdout_X.append(X[take])
+            holdout_y.append(y[take])
+            holdout_rows += len(take)
+        X, y = X[~test], y[~test]
+        reservoir.add(X, y)
+
+        if clf.n_estimators >= max_trees:
+            continue  # forest is full; later chunks only feed the holdout / sample
+        if pending is not None:
+            # A previous chunk had a single class: train on both together
+            X, y = np.concatenate([pending[0], X]), np.concatenate([pending[1], y])
+            pending = None
+        if len(np.unique(y)) < 2:
+            pending = (X, y)
+            continue
+
+        clf.n_estimators = min(clf.n_estimators + trees_per_chunk, max_trees)
+        start = time.perf_counter()
+        clf.fit(X, y)
+        stats["fit_s"] += time.perf_counter() - start
+        stats["rows_trained"] += len(X)
+
+    if clf.n_estimators == 0:
+        raise ValueError("no training rows with both classes")
+    stats["fit_s"] = round(stats["fit_s"], 3)
+    stats["trees"] = clf.n_estimators
+    holdout = (np.concatenate(holdout_X), np.concatenate(holdout_y))
+    return clf, holdout, reservoir.sample(), stats
+
+
+# --- Compression ---
+def _subforest(model, n_trees):
+    """The first `n_trees` trees of a fitted forest"""
+    small = RandomForestClassifier(**{**model.get_params(), "n_estimators": n_trees, "warm_start": False})
+    small.estimators_ = model.estimators_[:n_trees]
+    for attr in ("classes_", "n_classes_", "n_features_in_", "n_outputs_", "feature_names_in_"):
+        if hasattr(model, attr):
+            setattr(small, attr, getattr(model, attr))
+    return small
+
+
+def single_row_p99_ms(predict_proba, X, runs=300):
+    """p99 wall time of scoring one row (rows cycled from X)"""
+    rows = [X[i % len(X)].reshape(1, -1) for i in range(runs)]
+    for row in rows[:10]:
+        predict_proba(row)
+    samples = np.empty(runs)
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        predict_proba(row)
+        samples[i] = time.perf_counter() - start
+    return round(float(np.percentile(samples, 99) * 1000), 4)
+
+
+def _node_count(model):
+    return int(sum(est.tree_.node_count for est in model.estimators_))
+
+
+def compress(model, holdout, sample, tree_counts=(10, 25, 50, 100), depths=(None, 12, 8, 6),
+             n_jobs=N_JOBS, seed=42, latency_runs=300):
+    """
+    Candidates over (number of trees, max depth). Shallower forests are refit
+    on the reservoir sample; fewer trees are a prefix of a fitted forest.
+    Returns (candidates, fitted models keyed by (trees, depth)).
+    """
+    X_test, y_test = holdout
+    inference_X = X_test.astype(np.float32)  # sklearn converts to float32 anyway
+    candidates, models = [], {}
+    for depth in depths:
+        if depth is None or depth == model.max_depth:
+            base = model
+        else:
+            base = RandomForestClassifier(n_estimators=model.n_estimators, max_depth=depth,
+                                          n_jobs=n_jobs, random_state=seed).fit(*sample)
+        for n_trees in sorted({min(n, base.n_estimators) for n in tree_counts}):
+            candidate = base if n_trees == base.n_estimators else _subforest(base, n_trees)
+            candidate.set_params(n_jobs=1)  # request path scores one row at a time
+            compiled = CompiledForest(candidate)
+            candidates.append({
+                "trees": n_trees,
+                "max_depth": depth,
+                "nodes": _node_count(candidate),
+                "accuracy": round(float((candidate.predict(X_test) == y_test).mean()), 5),
+                "p99_ms_sklearn": single_row_p99_ms(candidate.predict_proba, inference_X, latency_runs),
+                "p99_ms_compiled": single_row_p99_ms(compiled.predict_proba, inference_X, latency_runs),
+            })
+            models[(n_trees, depth)] = candidate
+    return candidates, models
+
+
+def choose(candidates, min_accuracy=None, tolerance=0.005, backend="sklearn"):
+    """Fastest candidate whose accuracy is >= min_accuracy (default: best - tolerance)"""
+    bar = min_accuracy if min_accuracy is not None else max(c["accuracy"] for c in candidates) - tolerance
+    eligible = [c for c in candidates if c["accuracy"] >= bar] or candidates
+    key = f"p99_ms_{backend}"
+    return min(eligible, key=lambda c: (c[key], c["nodes"])), bar
+
+
+# --- Artifacts ---
+def _next_version(model_dir):
+    versions = [0]
+    if os.path.isdir(model_dir):
+        for name in os.listdir(model_dir):
+            if name.startswith("eligibility_model-v") and name.endswith(".pkl"):
+                try:
+                    versions.append(int(name[len("eligibility_model-v"):].split("-")[0]))
+                except ValueError:
+                    pass
+    return max(versions) + 1
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def save_artifact(model, metadata, model_dir=MODEL_DIR, promote_to=None):
+    """
+    models/eligibility_model-v{N}-{timestamp}.pkl plus a .json with the
+    training and benchmark numbers. promote_to atomically replaces that path
+    (e.g. MODEL_PATH, which running servers hot-reload).
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    version = _next_version(model_dir)
+    stamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    path = os.path.join(model_dir, f"eligibility_model-v{version}-{stamp}.pkl")
+    joblib.dump(model, path)
+    metadata = {"version": version, "created": datetime.datetime.now().isoformat(timespec="seconds"),
+                "path": path, "sha256": _sha256(path), **metadata}
+    with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, default=str)
+
+    if promote_to:
+        tmp_path = f"{promote_to}.tmp"
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, promote_to)
+        with open(f"{promote_to}.json", "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2, default=str)
+        print(f" Promoted v{version} to {promote_to}")
+    print(f" Saved {path}")
+    return path, metadata
+
+
+# --- CLI ---
+def main():
+    parser = argparse.ArgumentParser(description="Train, compress and version the eligibility model")
+    parser.add_argument("--source", choices=["synthetic", "decisions"], default="synthetic")
+    parser.add_argument("--rows", type=int, default=1000000, help="synthetic rows")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--trees-per-chunk", type=int, default=10)
+    parser.add_argument("--max-trees", type=int, default=100)
+    parser.add_argument("--n-jobs", type=int, default=N_JOBS)
+    parser.add_argument("--tree-counts", type=int, nargs="+", default=[10, 25, 50, 100])
+    parser.add_argument("--depths", nargs="+", default=["none", "12", "8", "6"])
+    parser.add_argument("--min-accuracy", type=float, default=None)
+    parser.add_argument("--backend", choices=["sklearn", "compiled"],
+                        default=os.getenv("ELIGIBILITY_BACKEND", "sklearn"),
+                        help="inference backend whose p99 picks the model")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--promote", action="store_true", help=f"also replace {MODEL_PATH}")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.source == "synthetic":
+        chunks = synthetic_chunks(args.rows, args.chunk_size, seed=args.seed)
+    else:
+        chunks = decision_log_chunks(args.chunk_size)
+
+    model, holdout, sample, stats = train_streaming(
+        chunks, trees_per_chunk=args.trees_per_chunk, max_trees=args.max_trees,
+        n_jobs=args.n_jobs, seed=args.seed,
+    )
+    print(f" Trained {stats['trees']} trees on {stats['rows_trained']} rows "
+          f"({stats['chunks']} chunks) in {stats['fit_s']}s")
+
+    depths = [None if d.lower() == "none" else int(d) for d in args.depths]
+    candidates, models = compress(model, holdout, sample, args.tree_counts, depths,
+                                  n_jobs=args.n_jobs, seed=args.seed)
+    best, bar = choose(candidates, args.min_accuracy, backend=args.backend)
+
+    print(f" {'trees':>5} {'depth':>5} {'nodes':>8} {'accuracy':>9} {'p99 sklearn':>12} {'p99 compiled':>13}")
+    for c in candidates:
+        mark = " <-" if c is best else ""
+        print(f" {c['trees']:>5} {str(c['max_depth']):>5} {c['nodes']:>8} {c['accuracy']:>9.4f} "
+              f"{c['p99_ms_sklearn']:>10.3f}ms {c['p99_ms_compiled']:>11.3f}ms{mark}")
+
+    chosen = models[(best["trees"], best["max_depth"])]
+    save_artifact(chosen, {
+        "features": FEATURE_ORDER,
+        "source": args.source,
+        "training": stats,
+        "holdout_rows": int(len(holdout[1])),
+        "accuracy_bar": round(bar, 5),
+        "selected_by": f"p99_ms_{args.backend}",
+        "chosen": best,
+        "candidates": candidates,
+        "params": {k: v for k, v in vars(args).items() if k not in ("promote", "model_dir")},
+    }, model_dir=args.model_dir, promote_to=MODEL_PATH if args.promote else None)
+
+
+if __name__ == "__main__":
+    main()